@@ -0,0 +1,148 @@
+import os
+import sys
+import socket
+import signal
+import uuid
+import getpass
+import argparse
+import threading
+from time_tracker import TimeTracker
+from probe import ScriptedProbe
+from journal import DEFAULT_JOURNAL_DIR
+from collector import DEFAULT_PORT, FRAME_HEADER, encode_frame, decode_frame
+
+DEFAULT_AGENT_DIR = os.path.join(DEFAULT_JOURNAL_DIR, "agent")
+
+
+class AgentUplink:
+    # Копит приращения времени по заголовкам и раз в batch_interval отправляет их сборщику
+    # одним сжатым пакетом. Пакет повторяется, пока сборщик его не подтвердит;
+    # номер пакета позволяет сборщику отбросить повтор уже примененного пакета
+    def __init__(self, agent_id, host, port=DEFAULT_PORT, batch_interval=30.0, timeout=10):
+        self.agent_id = agent_id
+        self.address = (host, port)
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._deltas = {}
+        self._total = 0.0
+        self._intervals = 0
+        self.epoch = uuid.uuid4().hex  # Своя у каждого запуска: номера пакетов начинаются заново
+        self._seq = 0
+        self._pending = None  # Отправленный, но еще не подтвержденный пакет
+        self._socket = None
+
+    def add(self, title, start, duration):
+        # Слушатель интервалов TimeTracker; вызывается из потока трекера
+        key = title or ''
+        with self._lock:
+            self._deltas[key] = self._deltas.get(key, 0) + duration
+            self._total += duration
+            self._intervals += 1
+
+    def _next_batch(self):
+        with self._lock:
+            if not self._deltas:
+                return None
+            self._seq += 1
+            batch = {
+                'agent': self.agent_id,
+                'epoch': self.epoch,
+                'seq': self._seq,
+                'total': self._total,
+                'intervals': self._intervals,
+                'deltas': [[title or None, seconds] for title, seconds in self._deltas.items()],
+            }
+            self._deltas = {}
+            self._total = 0.0
+            self._intervals = 0
+            return batch
+
+    def flush(self):
+        # Сначала досылаем неподтвержденный пакет, затем накопленное с тех пор
+        if self._pending is None:
+            self._pending = self._next_batch()
+        while self._pending is not None:
+            if not self._send(self._pending):
+                return False
+            self._pending = self._next_batch()
+        return True
+
+    def _send(self, batch):
+        try:
+            if self._socket is None:
+                self._socket = socket.create_connection(self.address, timeout=self.timeout)
+            self._socket.sendall(encode_frame(batch))
+            header = self._receive(FRAME_HEADER.size)
+            (length,) = FRAME_HEADER.unpack(header)
+            ack = decode_frame(self._receive(length))
+            return ack.get('ack') == batch['seq']
+        except (OSError, ValueError) as e:
+            print(f"Сборщик недоступен ({self.address[0]}:{self.address[1]}): {e}")
+            self.close()
+            return False
+
+    def _receive(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("соединение закрыто")
+            data += chunk
+        return bytes(data)
+
+    def run(self, stop_event):
+        while not stop_event.wait(self.batch_interval):
+            self.flush()
+        self.flush()  # Последний пакет при остановке агента
+        self.close()
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Агент хронометража без окна: шлет интервалы сборщику")
+    parser.add_argument('--collector', default=f"127.0.0.1:{DEFAULT_PORT}", help="Адрес сборщика host:port")
+    parser.add_argument('--agent-id', default=f"{socket.gethostname()}-{getpass.getuser()}")
+    parser.add_argument('--batch-interval', type=float, default=30, help="Период отправки пакетов, сек.")
+    parser.add_argument('--sample-interval', type=int, default=1000, help="Базовый интервал опроса окна, мс")
+    parser.add_argument('--data-dir', default=DEFAULT_AGENT_DIR, help="Каталог журнала и истории агента")
+    parser.add_argument('--script', help="Файл заголовков для подставного источника окна (нагрузочные прогоны)")
+    parser.add_argument('--query-port', type=int, help="Отдавать снимки состояния по HTTP на этом порту 127.0.0.1")
+    args = parser.parse_args(argv)
+
+    host, _, port = args.collector.rpartition(':')
+    probe = ScriptedProbe.from_file(args.script, loop=True) if args.script else None
+    tracker = TimeTracker(None, [], probe=probe, journal_dir=args.data_dir,
+                          history_path=os.path.join(args.data_dir, "history.sqlite3"))
+    tracker.sample_interval = args.sample_interval
+    uplink = AgentUplink(args.agent_id, host, int(port), args.batch_interval)
+    tracker.interval_listeners.append(uplink.add)
+    tracker.query_port = args.query_port
+
+    stop_event = threading.Event()
+    sender = threading.Thread(target=uplink.run, args=(stop_event,), name="agent-uplink")
+    sender.start()
+
+    def stop(signum, frame):
+        tracker.request_stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"Агент {args.agent_id} отправляет интервалы на {args.collector}")
+    tracker.run()  # Без Qt-окна: цикл трекера выполняется прямо в главном потоке
+    if tracker.journal:
+        tracker.journal.close()
+    tracker.record_history()
+    tracker.query_port = None
+    stop_event.set()
+    sender.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+from time_tracker import TimeTracker
+from probe import TraceProbe
+from clock import VirtualClock
+from task_matcher import TaskMatcher
+from journal import read_intervals
+from retro import FocusTrace, retro_task_times
+
+# Метрики, для которых меньшее значение лучше; для остальных лучше большее
+LOWER_IS_BETTER = ('_ms', '_bytes', 'cpu_seconds', 'cpu_seconds_per_tracked_hour', 'app_times_entries')
+# Описательные величины прогона, а не показатели производительности
+INFORMATIONAL = ('tracked_hours', 'ticks', 'ticks_per_tracked_second')
+
+APPS = ["Google Chrome", "Visual Studio Code", "Microsoft Word", "Telegram", "Терминал", "Проводник",
+        "Microsoft Excel", "Slack", "Figma", "PyCharm"]
+
+
+def synthetic_trace(hours, titles, apps, seed):
+    # Трасса сессии: окна выбираются по закону Ципфа (несколько частых и длинный хвост),
+    # время в окне - от пары секунд до нескольких минут
+    rng = random.Random(seed)
+    app_names = [APPS[i % len(APPS)] + (f" {i // len(APPS)}" if i >= len(APPS) else "") for i in range(apps)]
+    pool = [f"Документ {i} - {app_names[rng.randrange(apps)]}" for i in range(titles)]
+    weights = [1 / (rank + 1) for rank in range(titles)]
+
+    intervals = []
+    remaining = hours * 3600
+    while remaining > 0:
+        duration = min(remaining, rng.expovariate(1 / 30) + 1)
+        intervals.append((rng.choices(pool, weights)[0], duration))
+        remaining -= duration
+    return intervals
+
+
+def load_trace(path):
+    # Журнал сессии (*.journal) или текст: "секунды<TAB>заголовок" на строку
+    if path.endswith('.journal'):
+        return [(title, duration) for title, _, duration in read_intervals(path)]
+    intervals = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            duration, _, title = line.rstrip('\n').partition('\t')
+            if duration:
+                intervals.append((title or None, float(duration)))
+    return intervals
+
+
+def synthetic_tasks(count, seed):
+    rng = random.Random(seed)
+    words = [f"Документ {i}" for i in range(count)] + APPS
+    return [{'name': rng.choice(words), 'planned_time': 10 ** 9} for _ in range(count)]
+
+
+def make_tracker(intervals, tasks):
+    clock = VirtualClock()
+    tracker = TimeTracker(None, None, journal_dir=None, clock=clock, history_path=None)
+    tracker.probe = TraceProbe(intervals, clock, on_exhausted=lambda: setattr(tracker, 'running', False))
+    tracker.warning_shown = True  # Без всплывающих окон
+    for task in tasks:
+        tracker.add_task(task['name'], task['planned_time'])
+    return tracker
+
+
+def bench_tracking(intervals, tasks):
+    # Прогон трассы через TimeTracker.run в текущем потоке на ускоренных часах
+    tracker = make_tracker(intervals, tasks)
+    gc.collect()
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    tracker.run()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+
+    tracked_hours = tracker.total_time / 3600
+    ticks = tracker.probe.samples
+    return tracker, {
+        'tracked_hours': tracked_hours,
+        'ticks': ticks,
+        'cpu_seconds': cpu,
+        'cpu_seconds_per_tracked_hour': cpu / tracked_hours if tracked_hours else 0,
+        'ticks_per_tracked_second': ticks / tracker.total_time if tracker.total_time else 0,
+        'ticks_per_cpu_second': ticks / cpu if cpu else 0,
+        'replay_speedup': tracker.total_time / wall if wall else 0,
+    }
+
+
+def bench_memory(intervals):
+    # Рост памяти учета по мере сессии: снимки после каждой четверти трассы
+    tracemalloc.start()
+    tracker = make_tracker([], [])
+    base = tracemalloc.get_traced_memory()[0]
+    growth = []
+    checkpoints = {len(intervals) * part // 4 for part in range(1, 5)}
+    for index, (title, duration) in enumerate(intervals, 1):
+        tracker.apply_interval(title, duration)
+        if index in checkpoints:
+            growth.append({
+                'intervals': index,
+                'app_times_entries': len(tracker.app_times),
+                'memory_bytes': tracemalloc.get_traced_memory()[0] - base,
+            })
+    tracemalloc.stop()
+    return {
+        'app_times_entries': len(tracker.app_times),
+        'memory_bytes': growth[-1]['memory_bytes'] if growth else 0,
+        'growth': growth,
+    }
+
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_reports(tracker, repeat):
+    def cold_chart():
+        tracker._chart_cache = (None, None)
+        tracker.create_chart()
+
+    return {
+        'save_report_ms': timed(tracker.save_report, repeat),
+        'create_chart_ms': timed(cold_chart, max(1, repeat // 5)),
+        'create_chart_cached_ms': timed(tracker.create_chart, repeat),
+    }
+
+
+def bench_matching(task_counts, cardinalities, lookups, seed):
+    # Пропускная способность сопоставления задач: холодный кэш (все заголовки новые) и теплый
+    rng = random.Random(seed)
+    results = {}
+    for cardinality in cardinalities:
+        titles = [f"Документ {rng.randrange(cardinality * 4)} - {rng.choice(APPS)} {i}" for i in range(cardinality)]
+        stream = [rng.choice(titles) for _ in range(lookups)]
+        for count in task_counts:
+            tasks = synthetic_tasks(count, seed + count)
+            start = time.perf_counter()
+            matcher = TaskMatcher(tasks, cache_size=len(titles))
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for title in titles:
+                matcher.match(title)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for title in stream:
+                matcher.match(title)
+            warm = time.perf_counter() - start
+
+            results[f"tasks_{count}_titles_{cardinality}"] = {
+                'build_ms': build * 1000,
+                'cold_matches_per_second': len(titles) / cold if cold else 0,
+                'warm_matches_per_second': len(stream) / warm if warm else 0,
+            }
+    return results
+
+
+def bench_retro(intervals, tasks, repeat):
+    # Пакетный пересчет задач по всей трассе: сопоставление уникальных заголовков и агрегация на NumPy
+    started, timed_intervals = time.time() - sum(duration for _, duration in intervals), []
+    for title, duration in intervals:
+        timed_intervals.append((title, started, duration))
+        started += duration
+    trace = FocusTrace.from_intervals(timed_intervals)
+    elapsed = timed(lambda: retro_task_times(trace, tasks), repeat)
+    return {
+        'retro_ms': elapsed,
+        'retro_intervals_per_second': len(intervals) / elapsed * 1000 if elapsed else 0,
+    }
+
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, threshold):
+    # Печатает изменения относительно базовой линии; возвращает список регрессий
+    current = flatten(results['metrics'])
+    previous = flatten(baseline['metrics'])
+    regressions = []
+    for name in sorted(current.keys() & previous.keys()):
+        old, new = previous[name], current[name]
+        if not old or name.rsplit('.', 1)[-1] in INFORMATIONAL:
+            continue
+        change = (new - old) / old
+        lower_is_better = name.endswith(LOWER_IS_BETTER)
+        worse = change > threshold if lower_is_better else change < -threshold
+        mark = "РЕГРЕССИЯ" if worse else ""
+        print(f"{name:70} {old:14.4f} -> {new:14.4f} ({change:+.1%}) {mark}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера хронометража на воспроизводимых трассах")
+    parser.add_argument('--trace', help="Записанная трасса: журнал сессии (*.journal) или TSV 'секунды<TAB>заголовок'")
+    parser.add_argument('--hours', type=float, default=8, help="Длительность синтетической сессии")
+    parser.add_argument('--titles', type=int, default=5000, help="Число различных заголовков в синтетической трассе")
+    parser.add_argument('--apps', type=int, default=30, help="Число приложений в синтетической трассе")
+    parser.add_argument('--tasks', type=int, default=20, help="Число задач во время прогона трассы")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=20, help="Повторы замеров задержки отчетов")
+    parser.add_argument('--output', help="Сохранить результаты в JSON (базовая линия)")
+    parser.add_argument('--compare', help="Сравнить с сохраненной базовой линией")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Допустимое ухудшение метрики (доля)")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        intervals = load_trace(args.trace)
+        source = args.trace
+        if not intervals:
+            parser.error(f"В трассе {args.trace} нет интервалов")
+    else:
+        intervals = synthetic_trace(args.hours, args.titles, args.apps, args.seed)
+        source = f"synthetic:hours={args.hours},titles={args.titles},apps={args.apps},seed={args.seed}"
+    tasks = synthetic_tasks(args.tasks, args.seed)
+
+    tracker, tracking = bench_tracking(intervals, tasks)
+    results = {
+        'trace': source,
+        'intervals': len(intervals),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'metrics': {
+            'tracking': tracking,
+            'memory': bench_memory(intervals),
+            'reports': bench_reports(tracker, args.repeat),
+            'retro': bench_retro(intervals, tasks, max(1, args.repeat // 5)),
+            'matching': bench_matching([1, 10, 50, 200], [100, 1000, 10000], 50000, args.seed),
+        },
+    }
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
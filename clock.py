@@ -0,0 +1,32 @@
+import time
+
+
+class SystemClock:
+    # Реальные часы трекера
+    def monotonic(self):
+        return time.monotonic()
+
+    def time(self):
+        return time.time()
+
+    def wait(self, event, timeout):
+        return event.wait(timeout)
+
+
+class VirtualClock:
+    # Ускоренные часы для прогонов без дисплея и реального ожидания: ожидание мгновенно сдвигает время
+    def __init__(self, start=0.0, epoch=None):
+        self.now = start
+        self.epoch = time.time() if epoch is None else epoch  # Unix-время, соответствующее нулю часов
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.epoch + self.now
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        self.now += timeout
+        return False
@@ -0,0 +1,225 @@
+import sys
+import json
+import time
+import zlib
+import random
+import struct
+import asyncio
+import argparse
+from title_store import TitleAggregator, app_name
+
+DEFAULT_PORT = 8765
+FRAME_HEADER = struct.Struct('>I')  # Длина сжатого тела кадра
+MAX_FRAME = 16 * 1024 * 1024
+
+
+def encode_frame(message):
+    # Кадр протокола агент <-> сборщик: длина + JSON, сжатый zlib
+    body = zlib.compress(json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def decode_frame(body):
+    return json.loads(zlib.decompress(body).decode('utf-8'))
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Слишком большой кадр: {length} байт")
+    return decode_frame(await reader.readexactly(length))
+
+
+class AgentState:
+    __slots__ = ('total', 'apps', 'last_seq', 'last_seen', 'batches')
+
+    def __init__(self):
+        self.total = 0.0
+        self.apps = {}  # Приложение -> время
+        # Эпоха процесса агента -> последний примененный пакет. Повторно присланные пакеты не учитываются,
+        # а перезапущенный агент нумерует пакеты заново в новой эпохе
+        self.last_seq = {}
+        self.last_seen = 0.0
+        self.batches = 0
+
+
+class FleetAggregate:
+    # Инкрементальная сводка по всем агентам: каждый пакет применяется сразу после приема.
+    # Заголовки по всему парку учитываются тем же ограниченным по памяти агрегатором, что и в трекере
+    def __init__(self, titles_per_app=10, max_apps=200):
+        self.agents = {}
+        self.titles = TitleAggregator(titles_per_app, max_apps)
+        self.app_totals = {}
+        self.total = 0.0
+        self.batches = 0
+        self.duplicates = 0
+        self.intervals = 0
+
+    def apply(self, batch):
+        agent = self.agents.get(batch['agent'])
+        if agent is None:
+            agent = self.agents[batch['agent']] = AgentState()
+        agent.last_seen = time.time()
+        epoch = batch.get('epoch')
+        if batch['seq'] <= agent.last_seq.get(epoch, 0):
+            self.duplicates += 1  # Агент не получил подтверждение и прислал пакет повторно
+            return False
+
+        agent.last_seq[epoch] = batch['seq']
+        agent.batches += 1
+        agent.total += batch['total']
+        self.total += batch['total']
+        self.batches += 1
+        self.intervals += batch.get('intervals', 0)
+        for title, seconds in batch['deltas']:
+            if not title:
+                continue  # Время без активного окна учитывается только в общем времени
+            app = app_name(title)
+            agent.apps[app] = agent.apps.get(app, 0) + seconds
+            self.app_totals[app] = self.app_totals.get(app, 0) + seconds
+            self.titles.add(title, seconds)
+        return True
+
+    def summary(self, top=10):
+        apps = sorted(self.app_totals.items(), key=lambda x: x[1], reverse=True)[:top]
+        return {
+            'agents': len(self.agents),
+            'batches': self.batches,
+            'duplicates': self.duplicates,
+            'intervals': self.intervals,
+            'total_time': self.total,
+            'top_apps': apps,
+        }
+
+
+class Collector:
+    # Сборщик пакетов от агентов: asyncio-сервер, одно соединение на агента,
+    # каждый пакет подтверждается после применения к сводке
+    def __init__(self, aggregate=None):
+        self.aggregate = aggregate or FleetAggregate()
+        self.connections = 0
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    message = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break  # Агент закрыл соединение
+
+                if message.get('type') == 'query':
+                    writer.write(encode_frame(self.aggregate.summary(message.get('top', 10))))
+                else:
+                    self.aggregate.apply(message)
+                    writer.write(encode_frame({'ack': message['seq']}))
+                await writer.drain()
+        except (ValueError, KeyError, zlib.error, ConnectionError) as e:
+            print(f"Ошибка соединения с агентом: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def report_forever(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            summary = self.aggregate.summary(5)
+            print(f"Агентов: {summary['agents']}, соединений: {self.connections}, пакетов: {summary['batches']}, "
+                  f"общее время: {summary['total_time']:.0f} сек.")
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+async def simulated_agent(agent_id, port, batches, deltas_per_batch, titles, rng, latencies):
+    # Имитация агента для нагрузочного теста: шлет пакеты по одному соединению и ждет подтверждений
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    sent = 0.0
+    try:
+        for seq in range(1, batches + 1):
+            deltas = [[rng.choice(titles), rng.uniform(1, 30)] for _ in range(deltas_per_batch)]
+            total = sum(seconds for _, seconds in deltas)
+            batch = {'agent': agent_id, 'epoch': 1, 'seq': seq, 'total': total, 'deltas': deltas,
+                     'intervals': deltas_per_batch}
+            started = time.perf_counter()
+            writer.write(encode_frame(batch))
+            await writer.drain()
+            ack = await read_frame(reader)
+            latencies.append(time.perf_counter() - started)
+            if ack.get('ack') != seq:
+                raise ValueError(f"Неожиданное подтверждение: {ack}")
+            sent += total
+    finally:
+        writer.close()
+    return sent
+
+
+async def load_test(agents, batches, deltas_per_batch, seed):
+    collector = Collector()
+    port = await collector.start('127.0.0.1', 0)
+    rng = random.Random(seed)
+    titles = [f"Документ {i} - Приложение {i % 40}" for i in range(5000)] + [None]
+    latencies = []
+
+    started = time.perf_counter()
+    sent = await asyncio.gather(*[
+        simulated_agent(f"agent-{i}", port, batches, deltas_per_batch, titles, random.Random(rng.random()), latencies)
+        for i in range(agents)
+    ])
+    elapsed = time.perf_counter() - started
+    await collector.close()
+
+    latencies.sort()
+    summary = collector.aggregate.summary(5)
+    return {
+        'agents': agents,
+        'batches': summary['batches'],
+        'seconds': elapsed,
+        'batches_per_second': summary['batches'] / elapsed if elapsed else 0,
+        'deltas_per_second': summary['batches'] * deltas_per_batch / elapsed if elapsed else 0,
+        'ack_p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'ack_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+        'consistent': abs(sum(sent) - summary['total_time']) < 1e-6 * max(1.0, sum(sent)),
+    }
+
+
+async def serve(host, port, report_interval):
+    collector = Collector()
+    port = await collector.start(host, port)
+    print(f"Сборщик слушает {host}:{port}")
+    await collector.report_forever(report_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сборщик интервалов от агентов хронометража")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--report-interval', type=float, default=10, help="Как часто печатать сводку, сек.")
+    parser.add_argument('--load-test', type=int, metavar='AGENTS', help="Нагрузочный тест с указанным числом агентов")
+    parser.add_argument('--batches', type=int, default=50, help="Пакетов на агента в нагрузочном тесте")
+    parser.add_argument('--deltas', type=int, default=100, help="Записей в пакете в нагрузочном тесте")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.load_test:
+        result = asyncio.run(load_test(args.load_test, args.batches, args.deltas, args.seed))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0 if result['consistent'] else 1
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.report_interval))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
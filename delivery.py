@@ -0,0 +1,192 @@
+import time
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from stats import TrackerStats
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+
+class Report:
+    # Готовый к отправке отчет: текст сообщения и документы (имя файла, содержимое)
+    __slots__ = ('text', 'documents')
+
+    def __init__(self, text, documents=()):
+        self.text = text
+        self.documents = list(documents)
+
+
+class ReportDelivery:
+    # Фоновая доставка отчетов в Telegram. Отчет формируется один раз в фоновом потоке
+    # и рассылается всем получателям параллельно через общий пул соединений.
+    # Непрошедшие запросы повторяются с экспоненциальной задержкой, но не дольше retry_budget на отчет.
+    # Периодический отчет, который еще не начал отправляться, заменяется более свежим.
+    # Все потоки доставки - фоновые (daemon): выход из программы их не ждет
+    def __init__(self, bot_token, chat_ids, api_url=TELEGRAM_API_URL, timeout=10, max_retries=4,
+                 backoff=1.0, max_workers=4, stats=None, retry_budget=60.0):
+        self.bot_token = bot_token
+        self.chat_ids = list(chat_ids)
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout  # Таймаут одного HTTP-запроса в секундах
+        self.max_retries = max_retries
+        self.backoff = backoff  # Задержка перед первым повтором; дальше удваивается
+        self.max_workers = max_workers
+        self.retry_budget = retry_budget  # Сколько секунд на отчет можно потратить на повторы
+        self.stats = stats or TrackerStats()  # Повторы, отказы и задержки HTTP-запросов
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._abort = threading.Event()  # Прерывает ожидание между повторами, когда ждать доставки больше нельзя
+        self._session = None
+        # Фоновый поток не держит процесс: при выходе недоставленное дожидаются через close(wait=True, timeout)
+        self._thread = threading.Thread(target=self._worker, name="report-delivery", daemon=True)
+        self._thread.start()
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    def submit(self, render, coalesce=False):
+        # render - функция без аргументов, возвращающая Report; вызывается уже в фоновом потоке.
+        # coalesce=True - отчет можно заменить более новым, пока он ждет в очереди
+        with self._condition:
+            if self._closed:
+                return False
+            stale = [job for job in self._jobs if job[1]]
+            for job in stale:
+                self._jobs.remove(job)  # Новый отчет делает ожидающие периодические неактуальными
+            self._jobs.append((render, coalesce))
+            self._condition.notify()
+        return True
+
+    def close(self, wait=False, timeout=None):
+        # Уже поставленные отчеты будут доставлены, новые не принимаются.
+        # wait=True - ждем доставки не дольше timeout; что не успело, отменяется без новых повторов
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if wait:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self._abort.set()
+                with self._condition:
+                    self._jobs.clear()
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._closed:
+                    self._condition.wait()
+                if not self._jobs:
+                    break
+                render, _ = self._jobs.popleft()
+
+            started = self.stats.start()
+            try:
+                report = render()
+            except Exception as e:
+                print(f"Ошибка при формировании отчета: {e}")
+                self.stats.count('report_render_failures')
+                continue
+            self.stats.stop('report_render', started)
+            self.stats.count('reports_rendered')
+
+            started = self.stats.start()
+            try:
+                delivered = self.deliver(report)
+            except Exception as e:
+                print(f"Ошибка при доставке отчета: {e}")
+                delivered = False
+            if not delivered:
+                self.stats.count('delivery_failures')
+            self.stats.stop('report_delivery', started)
+
+        if self._session is not None:
+            self._session.close()
+
+    def deliver(self, report):
+        # Рассылка по получателям в max_workers фоновых потоках; повторы всех получателей
+        # укладываются в общий бюджет времени отчета
+        deadline = time.monotonic() + self.retry_budget
+        chat_ids = iter(self.chat_ids)
+        lock = threading.Lock()
+        results = []
+
+        def fan_out():
+            while True:
+                with lock:
+                    chat_id = next(chat_ids, None)
+                if chat_id is None:
+                    return
+                try:
+                    delivered = self._deliver_to(chat_id, report, deadline)
+                except Exception as e:
+                    print(f"Ошибка при отправке в Telegram ({chat_id}): {e}")
+                    delivered = False
+                with lock:
+                    results.append(delivered)
+
+        threads = [threading.Thread(target=fan_out, name="report-fanout", daemon=True)
+                   for _ in range(min(self.max_workers, len(self.chat_ids)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(results) == len(self.chat_ids) and all(results)
+
+    def _deliver_to(self, chat_id, report, deadline=None):
+        delivered = self._post('sendMessage', {'chat_id': chat_id, 'text': report.text}, deadline=deadline)
+        if delivered:
+            print(f"Сообщение отправлено в Telegram ({chat_id}).")
+        for filename, content in report.documents:
+            delivered = self._post('sendDocument', {'chat_id': chat_id}, {'document': (filename, content)},
+                                   deadline) and delivered
+        return delivered
+
+    def _post(self, method, data, files=None, deadline=None):
+        url = f"{self.api_url}/bot{self.bot_token}/{method}"
+        for attempt in range(self.max_retries + 1):
+            if self._abort.is_set():
+                return False  # Доставку отменили при закрытии
+            delay = self.backoff * 2 ** attempt
+            if attempt:
+                self.stats.count('delivery_retries')
+            try:
+                started = self.stats.start()
+                response = self.session.post(url, data=data, files=files, timeout=self.timeout)
+                self.stats.stop('http_upload', started)
+                self.stats.count('http_requests')
+                if response.status_code == 200:
+                    return True
+                if response.status_code != 429 and response.status_code < 500:
+                    print(f"Telegram отклонил запрос {method}: {response.status_code}")
+                    return False  # Ошибка запроса - повтор не поможет
+                if response.status_code == 429:
+                    delay = max(delay, self._retry_after(response))
+            except requests.RequestException as e:
+                print(f"Ошибка при отправке в Telegram ({method}): {e}")
+
+            if attempt < self.max_retries:
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    print(f"Бюджет повторов отчета исчерпан ({method}).")
+                    return False
+                if self._abort.wait(delay):
+                    return False
+
+        print(f"Не удалось выполнить {method} после {self.max_retries + 1} попыток.")
+        return False
+
+    @staticmethod
+    def _retry_after(response):
+        # Telegram сообщает, через сколько секунд можно повторить запрос
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return 0
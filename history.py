@@ -0,0 +1,185 @@
+import os
+import sqlite3
+from datetime import date
+from journal import DEFAULT_JOURNAL_DIR
+
+DEFAULT_HISTORY_PATH = os.path.join(DEFAULT_JOURNAL_DIR, "history.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    total_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_apps (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    day TEXT NOT NULL,
+    app TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_apps_day ON session_apps(day);
+CREATE INDEX IF NOT EXISTS session_apps_app ON session_apps(app, day);
+CREATE TABLE IF NOT EXISTS session_tasks (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    day TEXT NOT NULL,
+    task TEXT NOT NULL,
+    planned_time REAL NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_tasks_day ON session_tasks(day);
+CREATE INDEX IF NOT EXISTS session_tasks_task ON session_tasks(task, day);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT PRIMARY KEY,
+    seconds REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_app_rollup (
+    day TEXT NOT NULL,
+    app TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (day, app)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_app_rollup_app ON daily_app_rollup(app, day);
+CREATE TABLE IF NOT EXISTS weekly_app_rollup (
+    week TEXT NOT NULL,
+    app TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (week, app)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_task_rollup (
+    day TEXT NOT NULL,
+    task TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (day, task)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_task_rollup_task ON daily_task_rollup(task, day);
+CREATE TABLE IF NOT EXISTS weekly_task_rollup (
+    week TEXT NOT NULL,
+    task TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (week, task)
+) WITHOUT ROWID;
+"""
+
+
+def week_of(day):
+    # ISO-неделя дня: "2024-W07"
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def day_bounds(start=None, end=None):
+    # Границы периода включительно в формате дней базы; date или строка "ГГГГ-ММ-ДД"
+    return str(start) if start else "0000-00-00", str(end) if end else "9999-99-99"
+
+
+class HistoryStore:
+    # История завершенных сессий во встроенной SQLite. Дневные и недельные сводки
+    # обновляются при записи сессии, поэтому запросы за любой период читают только их.
+    # Соединение открывается на каждую операцию: хранилище можно использовать из любого потока
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def record_session(self, started, ended, total_time, daily_totals, daily_apps, daily_tasks, tasks):
+        # daily_totals: {день: секунды}, daily_apps: {(день, приложение): секунды},
+        # daily_tasks: {(день, задача): секунды}, tasks: список задач сессии
+        planned = {task['name']: task['planned_time'] for task in tasks}
+        connection = self._connect()
+        try:
+            with connection:  # Одна транзакция: сессия и сводки записываются вместе или не записываются вовсе
+                session_id = connection.execute(
+                    "INSERT INTO sessions (started, ended, total_time) VALUES (?, ?, ?)",
+                    (started, ended, total_time),
+                ).lastrowid
+
+                connection.executemany(
+                    "INSERT INTO daily_totals (day, seconds) VALUES (?, ?) "
+                    "ON CONFLICT(day) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    daily_totals.items(),
+                )
+
+                connection.executemany(
+                    "INSERT INTO session_apps (session_id, day, app, seconds) VALUES (?, ?, ?, ?)",
+                    [(session_id, day, app, seconds) for (day, app), seconds in daily_apps.items()],
+                )
+                connection.executemany(
+                    "INSERT INTO daily_app_rollup (day, app, seconds) VALUES (?, ?, ?) "
+                    "ON CONFLICT(day, app) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    [(day, app, seconds) for (day, app), seconds in daily_apps.items()],
+                )
+                connection.executemany(
+                    "INSERT INTO weekly_app_rollup (week, app, seconds) VALUES (?, ?, ?) "
+                    "ON CONFLICT(week, app) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    [(week_of(day), app, seconds) for (day, app), seconds in daily_apps.items()],
+                )
+
+                connection.executemany(
+                    "INSERT INTO session_tasks (session_id, day, task, planned_time, seconds) VALUES (?, ?, ?, ?, ?)",
+                    [(session_id, day, task, planned.get(task, 0), seconds) for (day, task), seconds in daily_tasks.items()],
+                )
+                connection.executemany(
+                    "INSERT INTO daily_task_rollup (day, task, seconds) VALUES (?, ?, ?) "
+                    "ON CONFLICT(day, task) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    [(day, task, seconds) for (day, task), seconds in daily_tasks.items()],
+                )
+                connection.executemany(
+                    "INSERT INTO weekly_task_rollup (week, task, seconds) VALUES (?, ?, ?) "
+                    "ON CONFLICT(week, task) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    [(week_of(day), task, seconds) for (day, task), seconds in daily_tasks.items()],
+                )
+            return session_id
+        finally:
+            connection.close()
+
+    def _query(self, sql, parameters):
+        connection = self._connect()
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def total_time(self, start=None, end=None):
+        rows = self._query("SELECT COALESCE(SUM(seconds), 0) FROM daily_totals WHERE day BETWEEN ? AND ?",
+                           day_bounds(start, end))
+        return rows[0][0]
+
+    def app_times(self, start=None, end=None, app=None):
+        # {приложение: секунды} за период по убыванию времени
+        sql = "SELECT app, SUM(seconds) AS total FROM daily_app_rollup WHERE day BETWEEN ? AND ?"
+        parameters = list(day_bounds(start, end))
+        if app is not None:
+            sql += " AND app = ?"
+            parameters.append(app)
+        rows = self._query(sql + " GROUP BY app ORDER BY total DESC", parameters)
+        return dict(rows)
+
+    def task_times(self, start=None, end=None):
+        rows = self._query(
+            "SELECT task, SUM(seconds) AS total FROM daily_task_rollup WHERE day BETWEEN ? AND ? "
+            "GROUP BY task ORDER BY total DESC",
+            day_bounds(start, end),
+        )
+        return dict(rows)
+
+    def daily_app_times(self, start=None, end=None):
+        # [(день, приложение, секунды)] - для графиков по дням
+        return self._query(
+            "SELECT day, app, seconds FROM daily_app_rollup WHERE day BETWEEN ? AND ? ORDER BY day, seconds DESC",
+            day_bounds(start, end),
+        )
+
+    def weekly_app_times(self, start_week=None, end_week=None):
+        return self._query(
+            "SELECT week, app, seconds FROM weekly_app_rollup WHERE week BETWEEN ? AND ? ORDER BY week, seconds DESC",
+            (start_week or "0000-W00", end_week or "9999-W99"),
+        )
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import struct
+import threading
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".time_tracker")
+
+MAGIC = b'TTJ1'
+NO_WINDOW = 0xFFFFFFFF  # Идентификатор интервала без активного окна
+
+# Форматы записей журнала (после однобайтового типа записи)
+TITLE_RECORD = struct.Struct('<IH')  # T: id заголовка, длина заголовка в байтах + сам заголовок
+INTERVAL_RECORD = struct.Struct('<Idd')  # I: id заголовка, начало (unix-время), длительность
+TASK_RECORD = struct.Struct('<dH')  # K: запланированное время, длина названия + само название
+
+
+def read_records(path, offset=0):
+    # Читает журнал начиная с offset. Возвращает записи и смещение конца последней целой записи:
+    # все, что дальше, - недописанный при аварии хвост
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    records = []
+    if data[:len(MAGIC)] != MAGIC:
+        return records, 0
+
+    titles = {NO_WINDOW: None}
+    position = max(offset, len(MAGIC))
+    good = position
+    size = len(data)
+    while position < size:
+        kind = data[position:position + 1]
+        position += 1
+        if kind == b'I':
+            if position + INTERVAL_RECORD.size > size:
+                break
+            title_id, start, duration = INTERVAL_RECORD.unpack_from(data, position)
+            position += INTERVAL_RECORD.size
+            if title_id not in titles:
+                break  # Ссылка на неизвестный заголовок - дальше журнал поврежден
+            records.append(('interval', titles[title_id], start, duration))
+        elif kind == b'T':
+            if position + TITLE_RECORD.size > size:
+                break
+            title_id, length = TITLE_RECORD.unpack_from(data, position)
+            position += TITLE_RECORD.size
+            if position + length > size:
+                break
+            titles[title_id] = data[position:position + length].decode('utf-8', errors='replace')
+            position += length
+        elif kind == b'K':
+            if position + TASK_RECORD.size > size:
+                break
+            planned_time, length = TASK_RECORD.unpack_from(data, position)
+            position += TASK_RECORD.size
+            if position + length > size:
+                break
+            name = data[position:position + length].decode('utf-8', errors='replace')
+            position += length
+            records.append(('task', name, planned_time))
+        else:
+            break
+        good = position
+
+    return records, good
+
+
+def read_intervals(path):
+    # Все интервалы фокуса записанной сессии: (заголовок, начало, длительность)
+    records, _ = read_records(path)
+    return [record[1:] for record in records if record[0] == 'interval']
+
+
+class SessionJournal:
+    # Журнал текущей сессии: только дозапись интервалов фокуса в двоичный файл.
+    # Записи копятся в буфере и сбрасываются пачками, fsync делается не чаще fsync_interval.
+    # Периодический снимок состояния плюс хвост журнала позволяют быстро восстановиться после падения
+    def __init__(self, directory=DEFAULT_JOURNAL_DIR, flush_interval=2.0, fsync_interval=10.0,
+                 snapshot_interval=300.0):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, "session.journal")
+        self.snapshot_path = os.path.join(directory, "session.snapshot")
+        self.archive_dir = os.path.join(directory, "sessions")
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self.lock = threading.RLock()
+        self._file = None
+        self._buffer = bytearray()
+        self._pending = None  # Последний интервал: соседние интервалы одного окна склеиваются
+        self._title_ids = {}  # Заголовки с момента последнего снимка
+        self._written_titles = set()  # Заголовки, уже определенные в журнале после последнего снимка
+        self._last_flush = self._last_fsync = self._last_snapshot = time.monotonic()
+
+    def recover(self):
+        # Состояние незавершенной сессии: снимок и записи журнала после него. None, если восстанавливать нечего
+        if not os.path.exists(self.journal_path):
+            return None, []
+
+        state, offset = None, 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                snapshot = json.load(file)
+            state, offset = snapshot['state'], snapshot['offset']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        records, good = read_records(self.journal_path, offset)
+        if good < len(MAGIC):
+            return None, []  # Журнал без заголовка - начинаем заново
+        if good < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as file:
+                file.truncate(good)  # Отрезаем недописанный хвост, чтобы дозапись шла за целыми записями
+        return state, records
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.journal_path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        now = time.monotonic()
+        self._last_flush = self._last_fsync = self._last_snapshot = now
+
+    def _title_id(self, title):
+        if title is None:
+            return NO_WINDOW
+        title_id = self._title_ids.get(title)
+        if title_id is None:
+            title_id = self._title_ids[title] = len(self._title_ids)
+        if title_id not in self._written_titles:
+            data = title.encode('utf-8')[:0xFFFF]
+            self._buffer += b'T' + TITLE_RECORD.pack(title_id, len(data)) + data
+            self._written_titles.add(title_id)
+        return title_id
+
+    def _emit_pending(self):
+        if self._pending:
+            title, start, duration = self._pending
+            title_id = self._title_id(title)
+            self._buffer += b'I' + INTERVAL_RECORD.pack(title_id, start, duration)
+            self._pending = None
+
+    def append_interval(self, title, start, duration):
+        with self.lock:
+            pending = self._pending
+            if pending and pending[0] == title and abs(pending[1] + pending[2] - start) < 1:
+                self._pending = (title, pending[1], pending[2] + duration)  # Продолжение того же интервала
+                return
+            self._emit_pending()
+            self._pending = (title, start, duration)
+
+    def append_task(self, name, planned_time):
+        with self.lock:
+            self._emit_pending()
+            data = name.encode('utf-8')[:0xFFFF]
+            self._buffer += b'K' + TASK_RECORD.pack(planned_time, len(data)) + data
+
+    def flush(self, fsync=False):
+        with self.lock:
+            if self._file is None:
+                return
+            self._emit_pending()
+            if self._buffer:
+                self._file.write(self._buffer)
+                self._buffer.clear()
+            self._file.flush()
+            now = time.monotonic()
+            self._last_flush = now
+            if fsync:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+    def maybe_flush(self, export_state):
+        # Вызывается на каждом тике: дешево, пока не пришло время сброса буфера или снимка
+        now = time.monotonic()
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot(export_state)
+        elif now - self._last_flush >= self.flush_interval:
+            self.flush(fsync=now - self._last_fsync >= self.fsync_interval)
+
+    def snapshot(self, export_state):
+        with self.lock:
+            if self._file is None:
+                return
+            self.flush(fsync=True)
+            snapshot = {'offset': self._file.tell(), 'state': export_state()}
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(snapshot, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.snapshot_path)  # Снимок подменяется атомарно
+            # Хвост после снимка должен читаться без начала журнала: заголовки определяются заново,
+            # а id раздаются с нуля, чтобы словарь заголовков не рос на протяжении всей сессии
+            self._title_ids.clear()
+            self._written_titles.clear()
+            self._last_snapshot = time.monotonic()
+
+    def close(self, archive=True):
+        # Завершение сессии: журнал переносится в архив сессий, снимок больше не нужен
+        with self.lock:
+            if self._file is None:
+                return None
+            self.flush(fsync=True)
+            self._file.close()
+            self._file = None
+
+            archived = None
+            if archive:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                archived = os.path.join(self.archive_dir, time.strftime("%Y%m%d-%H%M%S") + ".journal")
+                os.replace(self.journal_path, archived)
+                if os.path.exists(self.snapshot_path):
+                    os.remove(self.snapshot_path)
+            return archived
@@ -1,11 +1,40 @@
+import time
+LAUNCH_TIME = time.perf_counter()  # Отметка как можно раньше: от нее считается время до появления окна
+
 import sys
+import threading
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 from main_window import MainWindow
 
+HEAVY_MODULES = ('matplotlib', 'requests', 'tkinter', 'pygetwindow')
+
+
+def warm_up():
+    # Подгружаем модули отчетов в фоне, уже после первой отрисовки окна
+    from time_tracker import TimeTracker
+    threading.Thread(target=TimeTracker.warm_up, name="warm-up", daemon=True).start()
+
+
+def report_startup_time(app):
+    # Режим замера: печатаем время до первой отрисовки окна и выходим
+    elapsed = (time.perf_counter() - LAUNCH_TIME) * 1000
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"Время до первой отрисовки окна: {elapsed:.1f} мс")
+    print(f"Тяжелые модули, загруженные при запуске: {', '.join(loaded) or 'нет'}")
+    app.quit()
+
+
 def main():
+    measure_startup = "--startup-time" in sys.argv
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    # Нулевой таймер срабатывает, когда цикл событий обработал показ и отрисовку окна
+    if measure_startup:
+        QTimer.singleShot(0, lambda: report_startup_time(app))
+    else:
+        QTimer.singleShot(0, warm_up)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
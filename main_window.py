@@ -1,6 +1,7 @@
 from PyQt5.QtWidgets import QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QMessageBox, QInputDialog
 from time_tracker import TimeTracker
 from settings import SettingsDialog
+import time
 import webbrowser
 from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont, QIcon
@@ -12,6 +13,10 @@ class MainWindow(QMainWindow):
         self.initUI()
         self.timer = QTimer()
         self.timer.timeout.connect(self.send_periodic_report)
+        self.time_snapshot = (0.0, 0.0, False)  # Последний снимок времени от трекера
+        self.shown_seconds = None  # Секунды, которые сейчас показаны в метке
+        self.display_timer = QTimer()  # Обновляет метку с частотой отображения, а не с частотой тиков
+        self.display_timer.timeout.connect(self.refresh_label)
 
     def initUI(self):
         self.setWindowTitle("Таймер Хронометража")
@@ -74,6 +79,8 @@ class MainWindow(QMainWindow):
             self.tracker = TimeTracker(bot_token, chat_id)
             self.tracker.update_time.connect(self.update_label)
             self.tracker.start()
+            self.shown_seconds = None
+            self.display_timer.start(int(1000 / self.tracker.display_rate))
             self.label.setText("Статус: Хронометраж начат.")
             self.task_button.setEnabled(True)  # Разблокируем кнопку добавления задач
 
@@ -93,12 +100,22 @@ class MainWindow(QMainWindow):
                 self.label.setText("Статус: Хронометраж приостановлен.")
 
 
-    def update_label(self, formatted_time):
-        self.label.setText(f"Статус: Время - {formatted_time}")
+    def update_label(self, total_time, stamp, running):
+        self.time_snapshot = (total_time, stamp, running)  # Только запоминаем, метку обновляет display_timer
+
+    def refresh_label(self):
+        total_time, stamp, running = self.time_snapshot
+        if not running or not self.tracker or self.tracker.paused:
+            return  # На паузе в метке остается статус
+        seconds = int(total_time + time.monotonic() - stamp)  # Досчитываем время, прошедшее с последнего тика
+        if seconds != self.shown_seconds:  # Перерисовываем метку, только когда меняются секунды
+            self.shown_seconds = seconds
+            self.label.setText(f"Статус: Время - {self.tracker.format_time(seconds)}")
 
     def stop_tracking(self):
-        if self.tracker:
+        if self.tracker and self.tracker.isRunning():
             self.tracker.stop_tracking()
+            self.display_timer.stop()
             self.label.setText("Статус: Хронометраж завершен.")
             self.timer.stop()
             self.task_button.setEnabled(False)  # Блокируем кнопку добавления задач при завершении отсчета
@@ -113,8 +130,7 @@ class MainWindow(QMainWindow):
             planned_time_str, ok = QInputDialog.getText(self, "Запланированное время", "Введите запланированное время в секундах:")
             if ok and planned_time_str.isdigit():
                 planned_time = int(planned_time_str)
-                self.tracker.tasks.append({'name': task_name, 'planned_time': planned_time})
-                self.tracker.task_times[task_name] = 0  # Сохраняем время начала задачи
+                self.tracker.add_task(task_name, planned_time)
             else:
                 QMessageBox.warning(self, "Ошибка", "Некорректное запланированное время.")
         elif not ok:
@@ -127,12 +143,23 @@ class MainWindow(QMainWindow):
         settings_dialog = SettingsDialog(self.tracker)
         settings_dialog.exec_()  # Открываем диалог настроек
 
-        # После закрытия окна настроек обновляем таймер
+        # После закрытия окна настроек обновляем таймеры
+        if self.display_timer.isActive():
+            self.display_timer.start(int(1000 / self.tracker.display_rate))
         if self.tracker.auto_report_enabled:
             self.timer.start(self.tracker.report_interval * 60000)  # Устанавливаем интервал в миллисекундах
         else:
             self.timer.stop()  # Останавливаем таймер, если автоотчеты отключены
 
+    def closeEvent(self, event):
+        # Закрытие окна завершает сессию: финальный отчет, история и архив журнала,
+        # затем ограниченное ожидание доставки, чтобы процесс не зависал без сети
+        if self.tracker:
+            if self.tracker.isRunning():
+                self.stop_tracking()
+            self.tracker.wait_for_delivery(timeout=15)
+        super().closeEvent(event)
+
     def send_periodic_report(self):
         if self.tracker and self.tracker.auto_report_enabled:
             self.tracker.send_periodic_report()
\ No newline at end of file
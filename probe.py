@@ -0,0 +1,93 @@
+from bisect import bisect_right
+
+
+class WindowProbe:
+    # Источник заголовка активного окна; run опрашивает его ровно один раз за тик
+    def sample(self):
+        raise NotImplementedError
+
+
+class PyGetWindowProbe(WindowProbe):
+    # Источник по умолчанию: заголовок активного окна через pygetwindow
+    def __init__(self):
+        self._gw = None
+
+    def sample(self):
+        if self._gw is None:
+            import pygetwindow as gw  # Импортируем при первом опросе: на Linux pygetwindow недоступен
+            self._gw = gw
+        active_window = self._gw.getActiveWindow()
+        return active_window.title if active_window else None
+
+
+class ScriptedProbe(WindowProbe):
+    # Подставной источник: воспроизводит заданную последовательность заголовков (по одному на опрос).
+    # Не требует графической сессии, поэтому подходит для прогонов трекера на сервере без дисплея
+    def __init__(self, titles, loop=False, on_exhausted=None):
+        self.titles = list(titles)
+        self.loop = loop  # Начинать сценарий заново после последнего заголовка
+        self.on_exhausted = on_exhausted  # Вызывается один раз, когда сценарий закончился
+        self.position = 0
+        self.exhausted = False
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        # Один заголовок на строку; пустая строка означает отсутствие активного окна
+        with open(path, 'r', encoding='utf-8') as file:
+            titles = [line.rstrip('\n') or None for line in file]
+        return cls(titles, **kwargs)
+
+    def sample(self):
+        if not self.titles:
+            if not self.loop and not self.exhausted:
+                self.exhausted = True  # Пустой сценарий заканчивается на первом же опросе
+                if self.on_exhausted:
+                    self.on_exhausted()
+            return None
+        if self.position >= len(self.titles):
+            if not self.loop:
+                return self.titles[-1]  # Сценарий закончился - окно остается последним
+            self.position = 0
+
+        title = self.titles[self.position]
+        self.position += 1
+        if self.position >= len(self.titles) and not self.loop and not self.exhausted:
+            self.exhausted = True
+            if self.on_exhausted:
+                self.on_exhausted()
+        return title
+
+
+class TraceProbe(WindowProbe):
+    # Воспроизводит трассу интервалов фокуса [(заголовок, длительность), ...] по часам трекера:
+    # возвращает заголовок, активный в текущий момент. Вместе с VirtualClock позволяет
+    # прогонять записанные и синтетические сессии быстрее реального времени
+    def __init__(self, intervals, clock, on_exhausted=None):
+        self.clock = clock
+        self.on_exhausted = on_exhausted  # Вызывается один раз, когда трасса закончилась
+        self.titles = []
+        self.ends = []
+        offset = 0.0
+        for title, duration in intervals:
+            offset += duration
+            self.titles.append(title)
+            self.ends.append(offset)
+        self.duration = offset
+        self.start = None
+        self.samples = 0  # Сколько раз трекер опросил источник
+        self.exhausted = False  # Пустая трасса заканчивается на первом же опросе
+
+    def sample(self):
+        now = self.clock.monotonic()
+        if self.start is None:
+            self.start = now
+        self.samples += 1
+
+        index = bisect_right(self.ends, now - self.start)
+        if index >= len(self.titles):
+            if not self.exhausted:
+                self.exhausted = True
+                if self.on_exhausted:
+                    self.on_exhausted()
+            return self.titles[-1] if self.titles else None
+        return self.titles[index]
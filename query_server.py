@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_QUERY_PORT = 8766
+
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    # GET /snapshot[?top=N] - последний снимок трекера; GET /stats - счетчики и задержки.
+    # Запрос читает только опубликованный снимок и не останавливает поток трекера
+    def do_GET(self):
+        url = urlsplit(self.path)
+        tracker = self.server.tracker
+        if url.path == '/snapshot':
+            snapshot = tracker.snapshot  # Одна ссылка на неизменяемый снимок - ответ внутренне согласован
+            etag = f'"{snapshot.version}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)  # С прошлого запроса снимок не менялся
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            try:
+                top = int(parse_qs(url.query)['top'][0])
+            except (KeyError, ValueError):
+                top = None
+            self.send_json(snapshot.to_dict(top), etag)
+        elif url.path == '/stats':
+            self.send_json(tracker.stats.to_dict())
+        else:
+            self.send_error(404)
+
+    def send_json(self, data, etag=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Частые опросы не засоряют консоль
+
+
+class SnapshotServer:
+    # Локальная HTTP-точка для скриптов и виджетов: отдает снимки состояния трекера в JSON.
+    # По умолчанию слушает только 127.0.0.1
+    def __init__(self, tracker, host='127.0.0.1', port=DEFAULT_QUERY_PORT):
+        self.server = ThreadingHTTPServer((host, port), SnapshotHandler)
+        self.server.daemon_threads = True
+        self.server.tracker = tracker
+        self.port = self.server.server_address[1]  # Фактический порт, если передан 0
+        self._thread = threading.Thread(target=self.server.serve_forever, name="snapshot-server", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
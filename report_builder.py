@@ -0,0 +1,78 @@
+import io
+from bisect import bisect_left, insort
+
+
+class ReportBuilder:
+    # Текстовый отчет без полной пересортировки: рейтинг окон поддерживается отсортированным
+    # по мере изменения времени, строки неизменившихся записей берутся из кэша,
+    # а текст собирается в один и тот же буфер
+    def __init__(self, format_time):
+        self.format_time = format_time
+        self._ranking = []  # (-время, ключ) по убыванию времени
+        self._times = {}
+        self._lines = {}  # ключ -> (время, отформатированная строка)
+        self._buffer = io.StringIO()
+
+    def update(self, key, value):
+        # Слушатель TitleAggregator: value=None - ключ удален
+        old = self._times.get(key)
+        if old is not None:
+            del self._ranking[bisect_left(self._ranking, (-old, key))]
+        if value is None:
+            self._times.pop(key, None)
+            self._lines.pop(key, None)
+            return
+        self._times[key] = value
+        insort(self._ranking, (-value, key))
+
+    def ranking(self):
+        # ((ключ, время), ...) по убыванию времени; копия списка берется атомарно
+        return tuple((key, -negative_time) for negative_time, key in self._ranking[:])
+
+    def _line(self, key, time_spent):
+        cached = self._lines.get(key)
+        if cached is not None and cached[0] == time_spent:
+            return cached[1]
+        line = f"- {key}: {self.format_time(time_spent)}.\n"
+        self._lines[key] = (time_spent, line)
+        return line
+
+    def build(self, total_time, tasks, task_times, ranking=None):
+        # ranking - рейтинг из снимка состояния; без него берется текущий
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+
+        buffer.write(f"Общее время: {self.format_time(total_time)}.\n")
+        buffer.write("Хронометраж по приложениям:\n")
+        for key, time_spent in (self.ranking() if ranking is None else ranking):
+            buffer.write(self._line(key, time_spent))
+
+        buffer.write("\nЗадачи на сессию:\n")
+        for task in tasks:
+            planned_time = task['planned_time']
+            real_time = task_times.get(task['name'], 0)
+            if real_time >= planned_time:
+                buffer.write(f"- {task['name']}: Задача выполнена\n")
+            else:
+                buffer.write(f"- {task['name']}: {self.format_time(planned_time)} // {self.format_time(real_time)}\n")
+
+        return buffer.getvalue()
+
+    def build_period(self, start, end, total_time, app_times, task_times):
+        # Отчет по истории сессий за период; данные уже отсортированы и агрегированы базой
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+
+        buffer.write(f"Период: {start or 'с начала истории'} - {end or 'по сегодня'}.\n")
+        buffer.write(f"Общее время: {self.format_time(total_time)}.\n")
+        buffer.write("Хронометраж по приложениям:\n")
+        for app, time_spent in app_times.items():
+            buffer.write(f"- {app}: {self.format_time(time_spent)}.\n")
+
+        buffer.write("\nВремя по задачам:\n")
+        for task, time_spent in task_times.items():
+            buffer.write(f"- {task}: {self.format_time(time_spent)}\n")
+
+        return buffer.getvalue()
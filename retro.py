@@ -0,0 +1,259 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from datetime import date
+import numpy as np
+from journal import DEFAULT_JOURNAL_DIR, read_intervals
+from task_matcher import TaskMatcher
+
+
+class FocusTrace:
+    # Записанные интервалы фокуса в виде массивов NumPy: id заголовка, начало, длительность, сессия.
+    # Заголовки хранятся один раз в titles; интервалы без активного окна получают id -1
+    def __init__(self, titles, title_ids, starts, durations, sessions, session_names):
+        self.titles = titles
+        self.title_ids = title_ids
+        self.starts = starts
+        self.durations = durations
+        self.sessions = sessions
+        self.session_names = session_names
+
+    @classmethod
+    def from_intervals(cls, intervals, sessions=None, session_names=()):
+        # intervals: (заголовок, начало, длительность), как их возвращает journal.read_intervals
+        titles, ids = [], {}
+        title_ids = []
+        for title, _, _ in intervals:
+            if title is None:
+                title_ids.append(-1)
+                continue
+            title_id = ids.get(title)
+            if title_id is None:
+                title_id = ids[title] = len(titles)
+                titles.append(title)
+            title_ids.append(title_id)
+        return cls(
+            titles,
+            np.array(title_ids, dtype=np.int64),
+            np.array([interval[1] for interval in intervals], dtype=np.float64),
+            np.array([interval[2] for interval in intervals], dtype=np.float64),
+            np.zeros(len(intervals), dtype=np.int64) if sessions is None else np.array(sessions, dtype=np.int64),
+            list(session_names),
+        )
+
+    @classmethod
+    def from_journals(cls, paths, start=None, end=None):
+        # Интервалы из журналов сессий; start/end (дни включительно) отбирают интервалы по дню начала
+        intervals, sessions = [], []
+        for session, path in enumerate(paths):
+            session_intervals = read_intervals(path)
+            intervals.extend(session_intervals)
+            sessions.extend([session] * len(session_intervals))
+        trace = cls.from_intervals(intervals, sessions, [os.path.basename(path) for path in paths])
+        if start or end:
+            days = trace.days()[0]
+            trace = trace.select((days >= str(start or "0000-00-00")) & (days <= str(end or "9999-99-99")))
+        return trace
+
+    def select(self, mask):
+        return FocusTrace(self.titles, self.title_ids[mask], self.starts[mask], self.durations[mask],
+                          self.sessions[mask], self.session_names)
+
+    def days(self):
+        # День начала каждого интервала (местное время): (массив строк "ГГГГ-ММ-ДД", индексы дней).
+        # Дата вычисляется один раз на минуту, а не на интервал: смещения часовых поясов кратны минуте
+        minutes, inverse = np.unique((self.starts // 60).astype(np.int64), return_inverse=True)
+        minute_days = np.array([date.fromtimestamp(minute * 60).isoformat() for minute in minutes.tolist()],
+                               dtype='U10')
+        days = minute_days[inverse]
+        return days, np.unique(days, return_inverse=True)
+
+    @property
+    def total_time(self):
+        return float(self.durations.sum())
+
+
+def match_matrix(titles, tasks):
+    # Булева матрица заголовок x задача; каждый уникальный заголовок сопоставляется один раз
+    matcher = TaskMatcher(tasks)
+    matrix = np.zeros((len(titles), len(tasks)), dtype=bool)
+    for row, title in enumerate(titles):
+        matrix[row, matcher.indexes(title)] = True
+    return matrix
+
+
+def retro_task_times(trace, tasks, per_session=False):
+    # Пересчет времени задач по записанной трассе по тем же правилам, что и живой учет:
+    # время интервала засчитывается каждой подходящей задаче, сумма ограничена запланированным временем.
+    # Лимит применяется к накопленному времени в хронологическом порядке, поэтому по дням
+    # засчитывается ровно то, что засчитал бы живой учет. per_session=True - у каждой сессии свой лимит.
+    # Возвращает (task_times {задача: время}, daily_task_times {(день, задача): время})
+    unique = {}
+    for task in tasks:
+        unique.setdefault(task['name'], task)  # Время задач ведется по названию, повторы не удваивают учет
+    tasks = list(unique.values())
+    if not tasks or not len(trace.durations):
+        return {task['name']: 0.0 for task in tasks}, {}
+
+    # Сопоставляем только уникальные заголовки и дальше работаем лишь с теми, что подошли хоть одной задаче
+    matrix = match_matrix(trace.titles, tasks)
+    relevant = matrix.any(axis=1)
+    compact = np.full(len(trace.titles) + 1, -1, dtype=np.int64)  # Последний элемент - для id -1
+    compact[:-1][relevant] = np.arange(int(relevant.sum()))
+    trace = trace.select(compact[trace.title_ids] >= 0)
+    if not len(trace.durations):
+        return {task['name']: 0.0 for task in tasks}, {}
+    title_ids = compact[trace.title_ids]
+    matrix = matrix[relevant].astype(np.float64)
+    title_count = len(matrix)
+    day_names, day_index = trace.days()[1]
+    sessions = trace.sessions if per_session else np.zeros(len(title_ids), dtype=np.int64)
+
+    # Группа - (сессия, день); номера дней идут по возрастанию, поэтому группы упорядочены по времени.
+    # Время групп по заголовкам собирается одним bincount, а по задачам - умножением на матрицу совпадений
+    groups, group_index = np.unique(sessions * len(day_names) + day_index, return_inverse=True)
+    per_title = np.bincount(group_index * title_count + title_ids, weights=trace.durations,
+                            minlength=len(groups) * title_count).reshape(len(groups), title_count)
+    matched = per_title @ matrix  # группа x задача
+
+    # Накопленное время с начала сессии, ограниченное планом; засчитанное за группу - его приращение
+    planned = np.array([task['planned_time'] for task in tasks], dtype=np.float64)
+    group_sessions = groups // len(day_names)
+    first = np.r_[True, group_sessions[1:] != group_sessions[:-1]]  # Первая группа каждой сессии
+    last = np.r_[first[1:], True]
+    cumulative = np.cumsum(matched, axis=0)
+    session_base = (cumulative - matched)[first][np.cumsum(first) - 1]
+    capped = np.minimum(cumulative - session_base, planned)
+    previous = np.vstack([np.zeros(len(tasks)), capped[:-1]])
+    previous[first] = 0
+    credited = capped - previous
+
+    totals = capped[last].sum(axis=0)
+    task_times = {task['name']: float(totals[column]) for column, task in enumerate(tasks)}
+    daily_task_times = {}
+    for row, column in zip(*np.nonzero(credited > 0)):
+        key = (str(day_names[groups[row] % len(day_names)]), tasks[column]['name'])
+        daily_task_times[key] = daily_task_times.get(key, 0) + float(credited[row, column])
+    return task_times, daily_task_times
+
+
+def live_task_times(trace, tasks, per_session=False):
+    # Тот же пересчет, но по одному интервалу через живой учет трекера; для проверки пакетного режима
+    from time_tracker import TimeTracker
+    from probe import ScriptedProbe
+
+    unique = {}
+    for task in tasks:
+        unique.setdefault(task['name'], task)
+    task_times, daily_task_times = dict.fromkeys(unique, 0.0), {}
+    days = trace.days()[0]
+    session_ids = np.unique(trace.sessions) if per_session else [None]
+    for session in session_ids:
+        tracker = TimeTracker(None, None, probe=ScriptedProbe([]), journal_dir=None, history_path=None)
+        tracker._replaying = True  # Без предупреждений о выполненном плане
+        for task in unique.values():
+            tracker._add_task(task['name'], task['planned_time'])
+        indexes = np.flatnonzero(trace.sessions == session) if per_session else range(len(trace.durations))
+        for index in indexes:
+            title_id = trace.title_ids[index]
+            if title_id >= 0:
+                tracker.check_active_app_for_tasks(float(trace.durations[index]), trace.titles[title_id], str(days[index]))
+        for name, seconds in tracker.task_times.items():
+            task_times[name] += seconds
+        for key, seconds in tracker.daily_task_times.items():
+            daily_task_times[key] = daily_task_times.get(key, 0) + seconds
+    return task_times, daily_task_times
+
+
+def load_tasks(path):
+    # JSON-список задач [{"name", "planned_time"}] или текст: "секунды<TAB>название" на строку
+    with open(path, 'r', encoding='utf-8') as file:
+        if path.endswith('.json'):
+            return [{'name': task['name'], 'planned_time': float(task['planned_time'])} for task in json.load(file)]
+        tasks = []
+        for line in file:
+            planned, _, name = line.rstrip('\n').partition('\t')
+            if name:
+                tasks.append({'name': name, 'planned_time': float(planned)})
+        return tasks
+
+
+def session_journals(directory=DEFAULT_JOURNAL_DIR):
+    # Архив завершенных сессий по порядку; текущая незавершенная сессия - последней
+    paths = sorted(glob.glob(os.path.join(directory, "sessions", "*.journal")))
+    current = os.path.join(directory, "session.journal")
+    if os.path.exists(current):
+        paths.append(current)
+    return paths
+
+
+def format_time(seconds):
+    return f"{int(seconds // 3600)} ч. {int(seconds % 3600 // 60)} мин."
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пересчет времени задач по записанным сессиям")
+    parser.add_argument('tasks', help="Задачи: JSON [{name, planned_time}] или TSV 'секунды<TAB>название'")
+    parser.add_argument('--journal', action='append', help="Журнал сессии (*.journal); по умолчанию - все сессии")
+    parser.add_argument('--data-dir', default=DEFAULT_JOURNAL_DIR, help="Каталог журналов трекера")
+    parser.add_argument('--start', help="Первый день периода, ГГГГ-ММ-ДД")
+    parser.add_argument('--end', help="Последний день периода, ГГГГ-ММ-ДД")
+    parser.add_argument('--per-session', action='store_true', help="План задачи действует в каждой сессии отдельно")
+    parser.add_argument('--daily', action='store_true', help="Показать засчитанное время по дням")
+    parser.add_argument('--check', action='store_true', help="Сверить с живым учетом трекера по одному интервалу")
+    parser.add_argument('--output', help="Сохранить результат в JSON")
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.tasks)
+    paths = args.journal or session_journals(args.data_dir)
+    started = time.perf_counter()
+    trace = FocusTrace.from_journals(paths, args.start, args.end)
+    loaded = time.perf_counter()
+    task_times, daily_task_times = retro_task_times(trace, tasks, args.per_session)
+    computed = time.perf_counter()
+
+    print(f"Сессий: {len(paths)}, интервалов: {len(trace.durations)}, заголовков: {len(trace.titles)}, "
+          f"общее время: {format_time(trace.total_time)}")
+    print(f"Чтение журналов: {(loaded - started) * 1000:.0f} мс, пересчет: {(computed - loaded) * 1000:.0f} мс")
+    results = []
+    for name, actual in task_times.items():  # Порядок задач как в файле
+        task = next(task for task in tasks if task['name'] == name)
+        planned = task['planned_time']
+        results.append({'name': task['name'], 'planned_time': planned, 'real_time': actual,
+                        'done': actual / planned if planned else 0})
+    for result in results:
+        print(f"- {result['name']}: план {format_time(result['planned_time'])}, "
+              f"факт {format_time(result['real_time'])} ({result['done']:.0%})")
+    if args.daily:
+        for (day, task), seconds in sorted(daily_task_times.items()):
+            print(f"  {day} {task}: {format_time(seconds)}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({
+                'journals': paths,
+                'start': args.start,
+                'end': args.end,
+                'per_session': args.per_session,
+                'tasks': results,
+                'daily': [[day, task, seconds] for (day, task), seconds in sorted(daily_task_times.items())],
+            }, file, ensure_ascii=False, indent=2)
+
+    if args.check:
+        started = time.perf_counter()
+        expected, expected_daily = live_task_times(trace, tasks, args.per_session)
+        elapsed = time.perf_counter() - started
+        mismatched = [name for name in expected if abs(expected[name] - task_times[name]) > 1e-6 * max(1.0, expected[name])]
+        mismatched += [f"{day} {task}" for (day, task), seconds in expected_daily.items()
+                       if abs(seconds - daily_task_times.get((day, task), 0)) > 1e-6 * max(1.0, seconds)]
+        print(f"Живой учет: {elapsed * 1000:.0f} мс; расхождения: {', '.join(mismatched) or 'нет'}")
+        if mismatched:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
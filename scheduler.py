@@ -0,0 +1,27 @@
+class AdaptiveScheduler:
+    # Планировщик опроса активного окна: после переключения окна опрашиваем чаще,
+    # пока окно не меняется - постепенно увеличиваем интервал до максимального
+    def __init__(self, base_interval=1.0, fast_factor=0.25, slow_factor=4.0, backoff=1.5):
+        self.base_interval = base_interval  # Базовый интервал опроса в секундах
+        self.fast_factor = fast_factor  # Доля базового интервала сразу после переключения
+        self.slow_factor = slow_factor  # Во сколько раз интервал может вырасти без переключений
+        self.backoff = backoff  # Множитель увеличения интервала на каждом тике без изменений
+        self.interval = base_interval
+
+    @property
+    def min_interval(self):
+        return self.base_interval * self.fast_factor
+
+    @property
+    def max_interval(self):
+        return self.base_interval * self.slow_factor
+
+    def reset(self):
+        self.interval = self.base_interval
+
+    def next_interval(self, changed):
+        if changed:
+            self.interval = self.min_interval  # Окно сменилось - ускоряемся
+        else:
+            self.interval = min(max(self.interval, self.min_interval) * self.backoff, self.max_interval)
+        return self.interval
@@ -1,4 +1,5 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QCheckBox, QSpinBox, QPushButton, QLabel
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, QSpinBox, QPushButton, QLabel, QPlainTextEdit, QFileDialog, QMessageBox
+from PyQt5.QtCore import QTimer
 
 class SettingsDialog(QDialog):
     def __init__(self, tracker):
@@ -8,7 +9,7 @@ class SettingsDialog(QDialog):
 
     def initUI(self):
         self.setWindowTitle("Настройки")
-        self.setGeometry(100, 100, 300, 300)
+        self.setGeometry(100, 100, 300, 620)
 
         layout = QVBoxLayout()
 
@@ -42,6 +43,59 @@ class SettingsDialog(QDialog):
         self.elements_threshold_spinner.setValue(10)  # Устанавливаем значение по умолчанию
         layout.addWidget(self.elements_threshold_spinner)
 
+        self.sample_interval_label = QLabel("Базовый интервал опроса окна (мс):")
+        layout.addWidget(self.sample_interval_label)
+
+        self.sample_interval_spinner = QSpinBox()
+        self.sample_interval_spinner.setRange(100, 10000)
+        self.sample_interval_spinner.setSingleStep(100)
+        self.sample_interval_spinner.setValue(self.tracker.sample_interval)
+        self.sample_interval_spinner.setFixedWidth(80)
+        layout.addWidget(self.sample_interval_spinner)
+
+        self.display_rate_label = QLabel("Частота обновления времени в окне (раз в секунду):")
+        layout.addWidget(self.display_rate_label)
+
+        self.display_rate_spinner = QSpinBox()
+        self.display_rate_spinner.setRange(1, 10)
+        self.display_rate_spinner.setValue(self.tracker.display_rate)
+        self.display_rate_spinner.setFixedWidth(80)
+        layout.addWidget(self.display_rate_spinner)
+
+        self.titles_per_app_label = QLabel("Окон на приложение в отчете (остальные - в 'прочие'):")
+        layout.addWidget(self.titles_per_app_label)
+
+        self.titles_per_app_spinner = QSpinBox()
+        self.titles_per_app_spinner.setRange(1, 100)
+        self.titles_per_app_spinner.setValue(self.tracker.title_aggregator.titles_per_app)
+        self.titles_per_app_spinner.setFixedWidth(80)
+        layout.addWidget(self.titles_per_app_spinner)
+
+        self.max_apps_label = QLabel("Максимум отслеживаемых приложений:")
+        layout.addWidget(self.max_apps_label)
+
+        self.max_apps_spinner = QSpinBox()
+        self.max_apps_spinner.setRange(5, 500)
+        self.max_apps_spinner.setValue(self.tracker.title_aggregator.max_apps)
+        self.max_apps_spinner.setFixedWidth(80)
+        layout.addWidget(self.max_apps_spinner)
+
+        from query_server import DEFAULT_QUERY_PORT  # http.server не загружаем при запуске приложения
+        self.query_checkbox = QCheckBox("Отдавать состояние по HTTP (127.0.0.1)")
+        self.query_checkbox.setChecked(self.tracker.query_port is not None)
+        layout.addWidget(self.query_checkbox)
+
+        self.query_port_spinner = QSpinBox()
+        self.query_port_spinner.setRange(1024, 65535)
+        self.query_port_spinner.setValue(self.tracker.query_port or DEFAULT_QUERY_PORT)
+        self.query_port_spinner.setFixedWidth(80)
+        layout.addWidget(self.query_port_spinner)
+
+        self.stats_button = QPushButton("📊 Статистика")
+        self.stats_button.setStyleSheet("background-color: #2196F3; color: white; font-size: 12px;")
+        self.stats_button.clicked.connect(self.open_stats)
+        layout.addWidget(self.stats_button)
+
         self.save_button = QPushButton("Сохранить настройки")
         self.save_button.setStyleSheet("background-color: #4CAF50; color: white; font-size: 12px;")
         self.save_button.clicked.connect(self.save_settings)
@@ -55,4 +109,80 @@ class SettingsDialog(QDialog):
         self.tracker.report_interval = self.interval_spinner.value()
         self.tracker.threshold_percentage = self.threshold_spinner.value()
         self.tracker.elements_threshold = self.elements_threshold_spinner.value()  # Сохраняем пороговое количество элементов
-        self.close()
\ No newline at end of file
+        self.tracker.sample_interval = self.sample_interval_spinner.value()  # Базовый интервал опроса активного окна
+        self.tracker.display_rate = self.display_rate_spinner.value()  # Частота обновления метки времени
+        self.tracker.title_aggregator.titles_per_app = self.titles_per_app_spinner.value()  # Бюджет памяти учета окон
+        self.tracker.title_aggregator.max_apps = self.max_apps_spinner.value()
+        # Точка запросов состояния: GET /snapshot и /stats на выбранном порту
+        self.tracker.query_port = self.query_port_spinner.value() if self.query_checkbox.isChecked() else None
+        self.close()
+
+    def open_stats(self):
+        stats_dialog = StatsDialog(self.tracker)
+        stats_dialog.exec_()
+
+
+class StatsDialog(QDialog):
+    def __init__(self, tracker):
+        super().__init__()
+        self.tracker = tracker
+        self.initUI()
+        self.timer = QTimer()  # Пока окно открыто, статистика обновляется раз в секунду
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def initUI(self):
+        self.setWindowTitle("Статистика трекера")
+        self.setGeometry(100, 100, 560, 420)
+
+        layout = QVBoxLayout()
+
+        self.enabled_checkbox = QCheckBox("Собирать статистику")
+        self.enabled_checkbox.setChecked(self.tracker.stats.enabled)
+        self.enabled_checkbox.toggled.connect(self.toggle_enabled)
+        layout.addWidget(self.enabled_checkbox)
+
+        self.stats_text = QPlainTextEdit()
+        self.stats_text.setReadOnly(True)
+        layout.addWidget(self.stats_text)
+
+        buttons = QHBoxLayout()
+        self.reset_button = QPushButton("Сбросить")
+        self.reset_button.setStyleSheet("background-color: #f44336; color: white; font-size: 12px;")
+        self.reset_button.clicked.connect(self.reset)
+        buttons.addWidget(self.reset_button)
+
+        self.export_button = QPushButton("Экспорт в JSON")
+        self.export_button.setStyleSheet("background-color: #4CAF50; color: white; font-size: 12px;")
+        self.export_button.clicked.connect(self.export)
+        buttons.addWidget(self.export_button)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+        self.setStyleSheet("background-color: #2E2E2E; color: white;")
+        self.refresh()
+
+    def refresh(self):
+        self.stats_text.setPlainText(self.tracker.stats.format())
+
+    def toggle_enabled(self, enabled):
+        self.tracker.stats.enabled = enabled
+        if enabled:
+            self.tracker.stats.reset()  # Скорость тиков считаем с момента включения
+        self.refresh()
+
+    def reset(self):
+        self.tracker.stats.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт статистики", "time_tracker_stats.json", "JSON (*.json)")
+        if path:
+            try:
+                self.tracker.stats.export(path)
+            except OSError as e:
+                QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить статистику: {e}")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
\ No newline at end of file
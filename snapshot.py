@@ -0,0 +1,48 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+
+class TrackerSnapshot(namedtuple('TrackerSnapshot', [
+    'version',  # Растет с каждой публикацией
+    'taken_at',  # Unix-время публикации
+    'total_time',
+    'running',
+    'paused',
+    'ranking',  # ((заголовок, время), ...) по убыванию времени
+    'app_times',  # Заголовок -> время, только для чтения
+    'tasks',  # Задачи, только для чтения
+    'task_times',
+    'data_version',  # Версия данных агрегатора (для кэша диаграммы)
+])):
+    # Неизменяемый снимок состояния трекера. Поток трекера публикует новый снимок целиком,
+    # читатели берут ссылку на текущий без блокировок и не видят частично обновленных данных
+    __slots__ = ()
+
+    @classmethod
+    def capture(cls, version, taken_at, total_time, running, paused, ranking, tasks, task_times, data_version,
+                app_times=None):
+        # app_times можно передать из предыдущего снимка, если рейтинг не менялся
+        ranking = tuple(ranking)
+        return cls(
+            version, taken_at, total_time, running, paused, ranking,
+            app_times if app_times is not None else MappingProxyType(dict(ranking)),
+            tuple(MappingProxyType(dict(task)) for task in tasks),
+            MappingProxyType(dict(task_times)),
+            data_version,
+        )
+
+    def to_dict(self, top=None):
+        ranking = self.ranking if top is None else self.ranking[:top]
+        return {
+            'version': self.version,
+            'taken_at': self.taken_at,
+            'total_time': self.total_time,
+            'running': self.running,
+            'paused': self.paused,
+            'apps': [[title, seconds] for title, seconds in ranking],
+            'tasks': [
+                {'name': task['name'], 'planned_time': task['planned_time'],
+                 'real_time': self.task_times.get(task['name'], 0)}
+                for task in self.tasks
+            ],
+        }
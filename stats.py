@@ -0,0 +1,103 @@
+import json
+import time
+
+
+class LatencyHistogram:
+    # Гистограмма задержек с логарифмическими корзинами по микросекундам: корзина i - до 2**i мкс
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.buckets[min(int(seconds * 1e6).bit_length(), 39)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        # Верхняя граница корзины, в которую попадает процентиль, в миллисекундах
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if bucket and seen >= rank:
+                return min(2 ** index / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0,
+            'p50_ms': self.percentile(0.5),
+            'p90_ms': self.percentile(0.9),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max * 1000,
+        }
+
+
+class TrackerStats:
+    # Счетчики и гистограммы задержек этапов трекера. Пока сбор выключен,
+    # start() и stop() сводятся к одной проверке флага
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.monotonic()
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, stage, started):
+        if self.enabled and started:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        uptime = time.monotonic() - self.started
+        return {
+            'enabled': self.enabled,
+            'uptime_seconds': uptime,
+            'tick_rate': self.counters.get('ticks', 0) / uptime if uptime else 0,
+            'counters': dict(self.counters),
+            'stages': {stage: histogram.to_dict() for stage, histogram in list(self.histograms.items())},
+        }
+
+    def format(self):
+        data = self.to_dict()
+        lines = [
+            f"Сбор статистики: {'включен' if data['enabled'] else 'выключен'}",
+            f"Время сбора: {data['uptime_seconds']:.0f} сек.",
+            f"Тиков в секунду: {data['tick_rate']:.2f}",
+            "",
+            "Счетчики:",
+        ]
+        lines += [f"  {name}: {value}" for name, value in sorted(data['counters'].items())]
+        lines += ["", "Этапы (мс): число / среднее / p50 / p90 / p99 / макс."]
+        for stage, histogram in sorted(data['stages'].items()):
+            lines.append(
+                f"  {stage}: {histogram['count']} / {histogram['mean_ms']:.3f} / {histogram['p50_ms']:.3f} / "
+                f"{histogram['p90_ms']:.3f} / {histogram['p99_ms']:.3f} / {histogram['max_ms']:.3f}"
+            )
+        return "\n".join(lines)
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,77 @@
+from collections import OrderedDict, deque
+
+
+class TaskMatcher:
+    # Сопоставление заголовка окна с задачами. Задача подходит, если хотя бы одно слово
+    # из ее названия входит в заголовок. Слова всех задач собраны в один автомат Ахо-Корасик,
+    # поэтому заголовок просматривается один раз независимо от числа задач,
+    # а результаты для уже встречавшихся заголовков берутся из LRU-кэша
+    def __init__(self, tasks, cache_size=1024):
+        self.tasks = tuple(tasks)  # Собственная копия: список задач трекера может меняться
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._build()
+
+    def _build(self):
+        goto = [{}]
+        output = [set()]
+        for index, task in enumerate(self.tasks):
+            for word in task['name'].split():
+                state = 0
+                for char in word:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][char] = next_state
+                        goto.append({})
+                        output.append(set())
+                    state = next_state
+                output[state].add(index)
+
+        # Суффиксные ссылки строим обходом в ширину, чтобы ссылка всегда вела на уже готовое состояние
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[next_state] = goto[link].get(char, 0)
+                output[next_state] |= output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [frozenset(indices) for indices in output]
+
+    def _scan(self, title):
+        return tuple(self.tasks[index] for index in self.indexes(title))  # Порядок задач как в исходном списке
+
+    def indexes(self, title):
+        # Номера подходящих задач по возрастанию, без кэша; для пакетного сопоставления
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set()
+        state = 0
+        for char in title:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return sorted(found)
+
+    def match(self, title):
+        cache = self._cache
+        tasks = cache.get(title)
+        if tasks is not None:
+            cache.move_to_end(title)
+            return tasks
+
+        tasks = self._scan(title) if self.tasks else ()
+        cache[title] = tasks
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)  # Вытесняем давно не встречавшийся заголовок
+        return tasks
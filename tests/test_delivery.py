@@ -0,0 +1,193 @@
+import os
+import re
+import sys
+import json
+import time
+import socket
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from delivery import ReportDelivery, Report
+from stats import TrackerStats
+
+
+class FakeTelegram(BaseHTTPRequestHandler):
+    # Подставной API Telegram: отвечает заранее заданными кодами, дальше - 200
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        chat_id = re.search(rb'chat_id(?:=|"\r\n\r\n)(\w+)', body).group(1).decode()
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path.rsplit('/', 1)[-1], chat_id, time.monotonic()))
+            status, payload = server.responses.pop(0) if server.responses else (200, {'ok': True})
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def telegram():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTelegram)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_delivery(server, chat_ids=('1',), **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return ReportDelivery('TOKEN', chat_ids, api_url=f"http://127.0.0.1:{server.server_port}", **kwargs)
+
+
+def test_server_error_is_retried(telegram):
+    telegram.responses = [(500, {}), (502, {})]
+    delivery = make_delivery(telegram, stats=TrackerStats(enabled=True))
+    assert delivery.deliver(Report("текст"))
+    delivery.close(wait=True)
+    assert [method for method, _, _ in telegram.requests] == ['sendMessage'] * 3
+    assert delivery.stats.counters['delivery_retries'] == 2
+
+
+def test_client_error_is_not_retried(telegram):
+    telegram.responses = [(400, {})]
+    delivery = make_delivery(telegram)
+    assert not delivery.deliver(Report("текст"))
+    delivery.close(wait=True)
+    assert len(telegram.requests) == 1
+
+
+def test_retry_after_is_respected(telegram):
+    telegram.responses = [(429, {'ok': False, 'parameters': {'retry_after': 0.3}})]
+    delivery = make_delivery(telegram)
+    assert delivery.deliver(Report("текст"))
+    delivery.close(wait=True)
+    first, second = telegram.requests
+    assert second[2] - first[2] >= 0.3
+
+
+def test_report_fans_out_to_all_chats(telegram):
+    delivery = make_delivery(telegram, chat_ids=['1', '2', '3'])
+    delivery.submit(lambda: Report("текст", [("report.txt", b"x"), ("chart.png", b"y")]))
+    delivery.close(wait=True)
+    for chat_id in ('1', '2', '3'):
+        methods = sorted(method for method, chat, _ in telegram.requests if chat == chat_id)
+        assert methods == ['sendDocument', 'sendDocument', 'sendMessage']
+
+
+def gated_renderer(rendered):
+    # Первый отчет держит поток доставки, пока тест наполняет очередь
+    picked_up, gate = threading.Event(), threading.Event()
+
+    def render(name):
+        def build():
+            if name == 'first':
+                picked_up.set()
+                gate.wait(5)
+            rendered.append(name)
+            return Report(name)
+        return build
+
+    return render, picked_up, gate
+
+
+def test_pending_periodic_reports_are_coalesced(telegram):
+    delivery = make_delivery(telegram)
+    rendered = []
+    render, picked_up, gate = gated_renderer(rendered)
+
+    delivery.submit(render('first'))
+    assert picked_up.wait(5)
+    for index in range(3):
+        delivery.submit(render(f"periodic {index}"), coalesce=True)
+    gate.set()
+    delivery.close(wait=True)
+    assert rendered == ['first', 'periodic 2']
+
+
+def test_final_report_replaces_pending_periodic(telegram):
+    delivery = make_delivery(telegram)
+    rendered = []
+    render, picked_up, gate = gated_renderer(rendered)
+
+    delivery.submit(render('first'))
+    assert picked_up.wait(5)
+    delivery.submit(render('periodic'), coalesce=True)
+    delivery.submit(render('final'))
+    gate.set()
+    delivery.close(wait=True)
+    assert rendered == ['first', 'final']
+
+
+def test_failed_delivery_does_not_stop_worker(telegram, monkeypatch):
+    delivery = make_delivery(telegram)
+    calls = []
+    original = delivery.deliver
+
+    def deliver(report):
+        calls.append(report.text)
+        if len(calls) == 1:
+            raise RuntimeError("cannot schedule new futures after interpreter shutdown")
+        return original(report)
+
+    monkeypatch.setattr(delivery, 'deliver', deliver)
+    delivery.submit(lambda: Report("первый"))
+    delivery.submit(lambda: Report("второй"))
+    delivery.close(wait=True, timeout=5)
+    assert calls == ["первый", "второй"]
+    assert [method for method, _, _ in telegram.requests] == ['sendMessage']
+
+
+@pytest.fixture
+def silent_server():
+    # Принимает соединения, но никогда не отвечает
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    yield listener.getsockname()[1]
+    listener.close()
+
+
+def test_close_timeout_bounds_pending_delivery(silent_server):
+    delivery = ReportDelivery('TOKEN', ['1', '2'], api_url=f"http://127.0.0.1:{silent_server}",
+                              timeout=2, max_retries=2, backoff=1.0)
+    delivery.submit(lambda: Report("текст", [("report.txt", b"x")]))
+    time.sleep(0.2)
+    started = time.monotonic()
+    delivery.close(wait=True, timeout=0.5)
+    assert time.monotonic() - started < 1.0
+    delivery._thread.join(5)  # Текущий запрос доживает до таймаута, повторов после отмены нет
+    assert not delivery._thread.is_alive()
+
+
+def test_pending_delivery_does_not_delay_exit(silent_server):
+    script = (
+        "from delivery import ReportDelivery, Report\n"
+        f"delivery = ReportDelivery('TOKEN', ['1', '2', '3'], api_url='http://127.0.0.1:{silent_server}')\n"
+        "delivery.submit(lambda: Report('текст', [('report.txt', b'x')]))\n"
+        "import time; time.sleep(0.2)\n"
+        "delivery.close(wait=True, timeout=0.5)\n"
+    )
+    started = time.monotonic()
+    subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   check=True, timeout=30)
+    assert time.monotonic() - started < 5
+
+
+def test_retry_budget_limits_retries(telegram):
+    telegram.responses = [(500, {})] * 10
+    delivery = make_delivery(telegram, backoff=0.2, max_retries=5, retry_budget=0.5)
+    started = time.monotonic()
+    assert not delivery.deliver(Report("текст"))
+    delivery.close(wait=True)
+    assert time.monotonic() - started < 1.0
+    assert len(telegram.requests) < 6
@@ -0,0 +1,39 @@
+import pytest
+from history import HistoryStore, week_of
+
+
+def record(store, day, seconds, app="Редактор", task="Отчет"):
+    store.record_session(0, seconds, seconds, {day: seconds}, {(day, app): seconds}, {(day, task): seconds / 2},
+                         [{'name': task, 'planned_time': 1000}])
+
+
+def test_rollups_accumulate_across_sessions(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    record(store, "2024-02-12", 100)
+    record(store, "2024-02-12", 50, app="Браузер")
+    record(store, "2024-02-13", 30)
+
+    assert store.total_time() == 180
+    assert store.total_time("2024-02-13", "2024-02-13") == 30
+    assert store.app_times() == {"Редактор": 130, "Браузер": 50}
+    assert store.app_times(app="Браузер") == {"Браузер": 50}
+    assert store.task_times("2024-02-12", "2024-02-12") == {"Отчет": 75}
+    assert store.weekly_app_times() == [(week_of("2024-02-12"), "Редактор", 130), (week_of("2024-02-12"), "Браузер", 50)]
+
+
+def test_week_of():
+    assert week_of("2024-02-12") == "2024-W07"
+    assert week_of("2024-12-30") == "2025-W01"
+
+
+def test_stopping_twice_records_session_once(tmp_path, monkeypatch):
+    pytest.importorskip('PyQt5')
+    from time_tracker import TimeTracker
+
+    tracker = TimeTracker(None, None, journal_dir=None, history_path=str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(tracker, 'send_final_report', lambda: None)  # Без обращения к сети
+    tracker.apply_interval("Документ - Редактор", 100.0, 1.7e9)
+    tracker.stop_tracking()
+    tracker.stop_tracking()
+    assert tracker.history.total_time() == 100.0
+    assert tracker.history._query("SELECT COUNT(*) FROM sessions", ())[0][0] == 1
@@ -0,0 +1,104 @@
+import os
+import pytest
+from journal import SessionJournal, read_intervals, read_records
+
+pytest.importorskip('PyQt5')
+from time_tracker import TimeTracker  # noqa: E402
+
+
+def tick(tracker, title, start, duration):
+    # То же, что делает поток трекера на тике: учет интервала и запись в журнал
+    tracker.apply_interval(title, duration, start)
+    tracker.journal.append_interval(title, start, duration)
+
+
+def crash(tracker):
+    # Аварийное завершение: записанное уже на диске, штатного закрытия журнала не было
+    tracker.journal.flush()
+    tracker.journal._file.close()
+
+
+def make_tracker(directory):
+    tracker = TimeTracker(None, None, journal_dir=str(directory), history_path=None)
+    tracker.warning_shown = True
+    return tracker
+
+
+def test_intervals_round_trip(tmp_path):
+    journal = SessionJournal(str(tmp_path))
+    journal.open()
+    journal.append_interval("a - A", 100.0, 1.0)
+    journal.append_interval("a - A", 101.0, 2.0)  # Продолжение того же окна склеивается
+    journal.append_interval(None, 103.0, 1.5)
+    journal.append_task("задача", 60)
+    journal.append_interval("б - Б", 104.5, 3.0)
+    journal.close(archive=False)
+    assert read_intervals(journal.journal_path) == [("a - A", 100.0, 3.0), (None, 103.0, 1.5), ("б - Б", 104.5, 3.0)]
+    assert ('task', "задача", 60.0) in read_records(journal.journal_path)[0]
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    journal = SessionJournal(str(tmp_path))
+    journal.open()
+    journal.append_interval("a - A", 100.0, 1.0)
+    journal.append_interval("b - B", 101.0, 1.0)
+    journal.close(archive=False)
+    size = os.path.getsize(journal.journal_path)
+    with open(journal.journal_path, 'ab') as file:
+        file.write(b'I\x01\x02')  # Запись оборвалась посередине
+
+    state, records = SessionJournal(str(tmp_path)).recover()
+    assert state is None
+    assert [record[1:] for record in records] == [("a - A", 100.0, 1.0), ("b - B", 101.0, 1.0)]
+    assert os.path.getsize(journal.journal_path) == size
+
+    reopened = SessionJournal(str(tmp_path))
+    reopened.open()
+    reopened.append_interval("c - C", 102.0, 1.0)
+    reopened.close(archive=False)
+    assert read_intervals(journal.journal_path)[-1] == ("c - C", 102.0, 1.0)
+
+
+def test_tracker_recovers_after_crash(tmp_path):
+    tracker = make_tracker(tmp_path)
+    tracker.add_task("Документ", 1000)
+    for index in range(30):
+        tick(tracker, f"Документ {index % 4} - Редактор", 1.7e9 + index * 10, 10.0)
+        if index == 14:
+            tracker.journal.snapshot(tracker.export_state)  # Часть сессии - в снимке, остальное - в хвосте
+    expected = (tracker.total_time, dict(tracker.app_times), dict(tracker.task_times), dict(tracker.daily_app_times))
+    crash(tracker)
+
+    recovered = make_tracker(tmp_path)
+    assert (recovered.total_time, dict(recovered.app_times), dict(recovered.task_times),
+            dict(recovered.daily_app_times)) == expected
+    assert [task['name'] for task in recovered.tasks] == ["Документ"]
+    recovered.journal.close()
+
+
+def test_crash_before_first_snapshot_keeps_session_start(tmp_path):
+    tracker = make_tracker(tmp_path)
+    tick(tracker, "a - A", 1.7e9, 5.0)
+    tick(tracker, "b - B", 1.7e9 + 5, 5.0)
+    crash(tracker)
+
+    recovered = make_tracker(tmp_path)
+    assert recovered.session_started == 1.7e9
+    assert recovered.total_time == 10.0
+    recovered.journal.close()
+
+
+def test_snapshot_resets_title_ids(tmp_path):
+    journal = SessionJournal(str(tmp_path))
+    journal.open()
+    for index in range(100):
+        journal.append_interval(f"окно {index} - A", 100.0 + index, 1.0)
+    journal.snapshot(lambda: {})
+    assert not journal._title_ids  # Словарь заголовков ограничен окнами после последнего снимка
+    journal.append_interval("новое - B", 200.0, 1.0)
+    journal.append_interval("окно 5 - A", 201.0, 1.0)
+    journal.close(archive=False)
+
+    intervals = read_intervals(journal.journal_path)
+    assert intervals[:100] == [(f"окно {index} - A", 100.0 + index, 1.0) for index in range(100)]
+    assert intervals[100:] == [("новое - B", 200.0, 1.0), ("окно 5 - A", 201.0, 1.0)]
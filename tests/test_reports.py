@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('requests')
+from time_tracker import TimeTracker  # noqa: E402
+
+
+@pytest.fixture
+def tracker():
+    return TimeTracker(None, None, journal_dir=None, history_path=None)
+
+
+def test_report_without_data_has_no_chart(tracker):
+    assert tracker.create_chart() is None
+    report = tracker.render_report()
+    assert [name for name, _ in report.documents] == ["time_tracker_report.txt"]
+    assert report.text == "Общее время: 0 ч. 0 мин. 0 сек.."
+
+
+def test_report_includes_chart_once_time_is_tracked(tracker):
+    tracker.apply_interval("Документ - Редактор", 30.0, 1.7e9)
+    report = tracker.render_report()
+    assert [name for name, _ in report.documents] == ["time_tracker_report.txt", "time_tracker_chart.png"]
+    assert report.documents[1][1].startswith(b'\x89PNG')
+    assert tracker.create_chart() is report.documents[1][1]  # Данные не менялись - диаграмма из кэша
@@ -0,0 +1,74 @@
+import json
+import urllib.request
+import urllib.error
+import pytest
+
+pytest.importorskip('PyQt5')
+from time_tracker import TimeTracker  # noqa: E402
+
+
+@pytest.fixture
+def tracker():
+    tracker = TimeTracker(None, None, journal_dir=None, history_path=None)
+    tracker.warning_shown = True
+    yield tracker
+    tracker.query_port = None
+
+
+def test_snapshot_reuses_ranking_until_data_changes(tracker):
+    tracker.apply_interval("a - A", 10.0, 1.7e9)
+    first = tracker.publish_snapshot()
+    second = tracker.publish_snapshot()
+    assert second.version == first.version + 1
+    assert second.ranking is first.ranking and second.app_times is first.app_times
+
+    tracker.apply_interval("b - B", 20.0, 1.7e9 + 10)
+    third = tracker.publish_snapshot()
+    assert third.data_version != first.data_version
+    assert third.ranking == (("b - B", 20.0), ("a - A", 10.0))
+    assert first.ranking == (("a - A", 10.0),)  # Старый снимок не меняется
+    assert third.total_time == 30.0
+
+
+def test_snapshot_is_immutable_and_isolated_from_tasks(tracker):
+    tracker.add_task("отчет", 100)
+    snapshot = tracker.publish_snapshot()
+    tracker.add_task("письмо", 50)
+    assert [task['name'] for task in snapshot.tasks] == ["отчет"]
+    with pytest.raises(TypeError):
+        snapshot.app_times["x"] = 1
+    with pytest.raises(TypeError):
+        snapshot.tasks[0]['name'] = "другое"
+
+
+def get(url, headers=None):
+    try:
+        response = urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=5)
+        return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_snapshot_endpoint_etag(tracker):
+    tracker.apply_interval("a - A", 10.0, 1.7e9)
+    tracker.apply_interval("b - B", 20.0, 1.7e9 + 10)
+    tracker.publish_snapshot()
+    tracker.query_port = 0
+    base = f"http://127.0.0.1:{tracker.query_port}"
+
+    status, headers, body = get(f"{base}/snapshot?top=1")
+    assert status == 200
+    data = json.loads(body)
+    assert data['apps'] == [["b - B", 20.0]] and data['total_time'] == 30.0
+    etag = headers['ETag']
+    assert etag == f'"{tracker.snapshot.version}"'
+
+    status, _, body = get(f"{base}/snapshot", {'If-None-Match': etag})
+    assert status == 304 and body == b''
+
+    tracker.publish_snapshot()
+    status, headers, _ = get(f"{base}/snapshot", {'If-None-Match': etag})
+    assert status == 200 and headers['ETag'] != etag
+
+    assert get(f"{base}/stats")[0] == 200
+    assert get(f"{base}/missing")[0] == 404
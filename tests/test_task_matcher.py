@@ -0,0 +1,38 @@
+import random
+from task_matcher import TaskMatcher
+
+
+def brute_force(tasks, title):
+    # Исходное правило: задача подходит, если хотя бы одно слово ее названия входит в заголовок
+    return [index for index, task in enumerate(tasks) if any(word in title for word in task['name'].split())]
+
+
+def test_matches_brute_force_on_random_titles():
+    rng = random.Random(3)
+    alphabet = "абвгдeab "
+    words = ["".join(rng.choice(alphabet.strip()) for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    tasks = [{'name': " ".join(rng.sample(words, rng.randint(1, 3))), 'planned_time': 60} for _ in range(40)]
+    matcher = TaskMatcher(tasks, cache_size=16)
+    titles = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(300)]
+    for title in titles + titles:  # Второй проход идет через кэш и вытеснение
+        expected = brute_force(tasks, title)
+        assert matcher.indexes(title) == expected
+        assert matcher.match(title) == tuple(tasks[index] for index in expected)
+
+
+def test_overlapping_words_and_task_order():
+    tasks = [
+        {'name': "отчет квартал", 'planned_time': 1},
+        {'name': "чет", 'planned_time': 1},
+        {'name': "Word", 'planned_time': 1},
+        {'name': "ал", 'planned_time': 1},
+    ]
+    matcher = TaskMatcher(tasks)
+    assert matcher.match("Годовой отчет - Microsoft Word") == (tasks[0], tasks[1], tasks[2])
+    assert matcher.match("word") == ()
+    assert matcher.match("квартал") == (tasks[0], tasks[3])
+
+
+def test_no_tasks():
+    matcher = TaskMatcher([])
+    assert matcher.match("что угодно") == ()
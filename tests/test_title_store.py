@@ -0,0 +1,74 @@
+import random
+import pytest
+from title_store import TitleAggregator, OTHER_APPS, app_name
+
+
+def zipf_stream(rng, count, titles, apps):
+    pool = [f"Документ {index} - Приложение {rng.randrange(apps)}" for index in range(titles)]
+    weights = [1 / (rank + 1) for rank in range(titles)]
+    return [(rng.choices(pool, weights)[0], rng.uniform(1, 60)) for _ in range(count)]
+
+
+def test_app_name():
+    assert app_name("main.py - Visual Studio Code") == "Visual Studio Code"
+    assert app_name("Вкладка | Сайт — Firefox") == "Firefox"
+    assert app_name("Терминал") == "Терминал"
+
+
+def test_total_is_preserved_and_memory_is_bounded():
+    rng = random.Random(1)
+    aggregator = TitleAggregator(titles_per_app=5, max_apps=10)
+    stream = zipf_stream(rng, 20000, 3000, 40)
+    for title, seconds in stream:
+        aggregator.add(title, seconds)
+
+    assert sum(aggregator.app_times.values()) == pytest.approx(sum(seconds for _, seconds in stream))
+    assert len(aggregator.apps) <= 10
+    assert all(len(bucket.title_ids) <= 5 for bucket in aggregator.apps.values())
+    assert len(aggregator.app_times) <= 10 * (5 + 1) + 1
+    assert len(aggregator.store) <= 10 * 5
+
+
+def test_heavy_titles_are_kept_and_never_overcounted():
+    rng = random.Random(2)
+    aggregator = TitleAggregator(titles_per_app=10, max_apps=20)
+    true_times = {}
+    stream = zipf_stream(rng, 20000, 2000, 60)
+    stream += [("Главный отчет - Приложение 0", 30.0)] * 2000  # Заведомо частое окно
+    rng.shuffle(stream)
+    for title, seconds in stream:
+        aggregator.add(title, seconds)
+        true_times[title] = true_times.get(title, 0) + seconds
+
+    assert "Главный отчет - Приложение 0" in aggregator.app_times
+    for title, seconds in aggregator.app_times.items():
+        if title in true_times:
+            assert seconds <= true_times[title] + 1e-6  # Учтенное время - нижняя оценка
+
+
+def test_listeners_and_eviction_listeners():
+    aggregator = TitleAggregator(titles_per_app=2, max_apps=2)
+    seen, evicted = {}, []
+    aggregator.listeners.append(lambda key, value: seen.__setitem__(key, value) if value is not None else seen.pop(key))
+    aggregator.eviction_listeners.append(evicted.append)
+    aggregator.add("a - A", 10)
+    aggregator.add("b - B", 20)
+    aggregator.add("c - C", 30)  # Вытесняет приложение с наименьшим временем
+    assert evicted == ["A"]
+    assert seen == aggregator.app_times
+    assert aggregator.app_times[OTHER_APPS] == 10
+
+
+def test_state_round_trip():
+    rng = random.Random(3)
+    aggregator = TitleAggregator(titles_per_app=4, max_apps=8)
+    for title, seconds in zipf_stream(rng, 5000, 500, 20):
+        aggregator.add(title, seconds)
+
+    restored = TitleAggregator(titles_per_app=4, max_apps=8)
+    restored.restore_state(aggregator.export_state())
+    assert restored.app_times == aggregator.app_times
+    for title, seconds in zipf_stream(rng, 1000, 500, 20):
+        aggregator.add(title, seconds)
+        restored.add(title, seconds)
+    assert restored.app_times == pytest.approx(aggregator.app_times)
@@ -0,0 +1,107 @@
+import pytest
+from clock import VirtualClock
+from probe import ScriptedProbe
+from scheduler import AdaptiveScheduler
+
+pytest.importorskip('PyQt5')
+from time_tracker import TimeTracker  # noqa: E402
+
+
+class ScheduledClock(VirtualClock):
+    # Ускоренные часы, которые выполняют действия (пауза, возобновление, остановка) в заданные моменты
+    def __init__(self, actions):
+        super().__init__(epoch=1.7e9)
+        self.actions = sorted(actions, key=lambda action: action[0])
+        self.fired = {}
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        self.now += timeout
+        while self.actions and self.actions[0][0] <= self.now:
+            _, name, action = self.actions.pop(0)
+            self.fired[name] = self.now
+            action()
+        return event.is_set()
+
+
+class RecordingProbe(ScriptedProbe):
+    def __init__(self, titles, clock):
+        super().__init__(titles, loop=True)
+        self.clock = clock
+        self.sampled_at = []
+
+    def sample(self):
+        self.sampled_at.append(self.clock.monotonic())
+        return super().sample()
+
+
+def make_tracker(actions, titles=("Документ - Редактор",)):
+    clock = ScheduledClock([])
+    tracker = TimeTracker(None, None, probe=RecordingProbe(titles, clock), journal_dir=None, clock=clock,
+                          history_path=None)
+    clock.actions = sorted([(at, name, getattr(tracker, name)) for at, name in actions], key=lambda action: action[0])
+    return tracker, clock
+
+
+def test_scheduler_speeds_up_on_change_and_backs_off_to_bounds():
+    scheduler = AdaptiveScheduler(base_interval=1.0, fast_factor=0.25, slow_factor=4.0, backoff=2.0)
+    assert scheduler.next_interval(True) == 0.25
+    assert [scheduler.next_interval(False) for _ in range(6)] == [0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+    scheduler.base_interval = 2.0
+    assert scheduler.next_interval(True) == 0.5
+    assert scheduler.next_interval(False) == 1.0
+    scheduler.reset()
+    assert scheduler.interval == 2.0
+
+
+def test_pause_time_is_not_counted():
+    tracker, clock = make_tracker([(10, 'pause_tracking'), (30, 'resume_tracking'), (50, 'request_stop')])
+    tracker.run()
+    paused, resumed, stopped = clock.fired['pause_tracking'], clock.fired['resume_tracking'], clock.fired['request_stop']
+    assert tracker.total_time == pytest.approx(paused + (stopped - resumed))
+    assert sum(tracker.app_times.values()) == pytest.approx(tracker.total_time)
+
+
+def test_window_is_sampled_immediately_after_resume():
+    tracker, clock = make_tracker([(20, 'pause_tracking'), (30, 'resume_tracking'), (60, 'request_stop')])
+    tracker.run()
+    resumed = clock.fired['resume_tracking']
+    # До паузы окно не менялось, и интервал опроса успел вырасти до максимального
+    before = [at for at in tracker.probe.sampled_at if at <= clock.fired['pause_tracking']]
+    assert max(b - a for a, b in zip(before, before[1:])) == pytest.approx(tracker.scheduler.max_interval)
+    assert min(at for at in tracker.probe.sampled_at if at >= resumed) == resumed
+
+
+def test_tick_after_pause_is_clamped_to_pause_start():
+    tracker, clock = make_tracker([(40, 'request_stop')])
+
+    def pause_and_wake_late():
+        tracker.pause_tracking()
+        clock.now += 3  # Поток трекера проснулся позже начала паузы
+
+    def resume():
+        tracker.resume_tracking()
+
+    clock.actions = sorted(clock.actions + [(10, 'late_pause', pause_and_wake_late), (20, 'resume', resume)],
+                           key=lambda action: action[0])
+    tracker.run()
+    paused = tracker.pause_start_time
+    assert paused == clock.fired['late_pause']
+    assert tracker.total_time == pytest.approx(paused + clock.fired['request_stop'] - clock.fired['resume'])
+
+
+def test_time_updates_are_throttled_to_display_rate():
+    titles = [f"Документ {index} - Редактор" for index in range(7)]  # Окно меняется на каждом тике
+    tracker, clock = make_tracker([(100, 'request_stop')], titles)
+    tracker.sample_interval = 100
+    tracker.display_rate = 2
+    updates = []
+    tracker.update_time.connect(lambda total, stamp, running: updates.append((total, stamp, running)))
+    tracker.run()
+
+    assert len(tracker.probe.sampled_at) > 600  # Опрос идет чаще, чем обновление интерфейса
+    stamps = [stamp for _, stamp, running in updates if running]
+    assert all(b - a >= 1 / tracker.display_rate - 1e-9 for a, b in zip(stamps, stamps[1:]))
+    assert len(stamps) <= 100 * tracker.display_rate + 1
+    assert updates[-1] == (tracker.total_time, clock.now, False)  # Последнее обновление - итог после остановки
@@ -1,26 +1,39 @@
-import time
-import os
-import requests
-import pygetwindow as gw
-import matplotlib.pyplot as plt
+import threading
+import io
+from datetime import date
 from PyQt5.QtCore import QThread, pyqtSignal
-import tkinter as tk
-from tkinter import messagebox
+from scheduler import AdaptiveScheduler
+from probe import PyGetWindowProbe
+from task_matcher import TaskMatcher
+from journal import SessionJournal, DEFAULT_JOURNAL_DIR
+from title_store import TitleAggregator, OTHER_APPS
+from report_builder import ReportBuilder
+from clock import SystemClock
+from stats import TrackerStats
+from history import HistoryStore, DEFAULT_HISTORY_PATH
+from snapshot import TrackerSnapshot
 
 class TimeTracker(QThread):
-    update_time = pyqtSignal(str)
+    update_time = pyqtSignal(float, float, bool)  # Общее время, момент замера (time.monotonic), идет ли отсчет
     send_report_signal = pyqtSignal()
 
-    def __init__(self, bot_token, chat_id):
+    def __init__(self, bot_token, chat_id, probe=None, journal_dir=DEFAULT_JOURNAL_DIR, clock=None,
+                 history_path=DEFAULT_HISTORY_PATH):
         super().__init__()
         self.total_time = 0
         self.running = False
         self.paused = False  # Флаг для отслеживания состояния паузы
-        self.app_times = {}
+        self.title_aggregator = TitleAggregator()  # Время по приложениям и окнам с ограниченной памятью
+        self.report_builder = ReportBuilder(self.format_time)  # Рейтинг окон обновляется по мере учета
+        self.title_aggregator.listeners.append(self.report_builder.update)
         self.tasks = []  # Задачи будут храниться в виде словарей
         self.task_times = {}  # Словарь для хранения реального времени задач
         self.bot_token = bot_token
         self.chat_id = chat_id
+        self.chat_ids = list(chat_id) if isinstance(chat_id, (list, tuple)) else [chat_id]  # Получатели отчетов
+        self._delivery = None  # Фоновая доставка отчетов, создается при первой отправке
+        self._chart_cache = (None, None)  # (версия данных, PNG) последней построенной диаграммы
+        self.display_rate = 2  # Не чаще скольких раз в секунду отправлять время в интерфейс
         self.auto_report_enabled = True  # Флаг для авторассылки отчетов
         self.report_interval = 5  # Интервал в минутах по умолчанию
         self.threshold_percentage = 5  # Пороговый процент по умолчанию
@@ -29,10 +42,175 @@ class TimeTracker(QThread):
         self.triggerd_count = 0
         self.elapsed_during_pause_temp = 0
         self.warning_shown = False  # Инициализация переменной
+        self.scheduler = AdaptiveScheduler()  # Адаптивный планировщик опроса активного окна
+        self._wake = threading.Event()  # Позволяет прервать ожидание между тиками при паузе/остановке
+        self.probe = probe or PyGetWindowProbe()  # Источник заголовка активного окна
+        self.clock = clock or SystemClock()  # Подменяется ускоренными часами в бенчмарках
+        self.stats = TrackerStats()  # Счетчики и задержки этапов; по умолчанию выключены
+        self.history = HistoryStore(history_path) if history_path else None  # None отключает историю сессий
+        self.session_started = self.clock.time()
+        self.daily_totals = {}  # День -> общее время за день
+        self.daily_app_times = {}  # (день, приложение) -> время; уходит в историю в конце сессии
+        self.daily_task_times = {}  # (день, задача) -> засчитанное задаче время
+        self.title_aggregator.eviction_listeners.append(self.fold_evicted_app)
+        self.interval_listeners = []  # Вызываются на каждом тике как listener(заголовок, начало, длительность)
+        self.snapshot = None  # Последний опубликованный неизменяемый снимок состояния
+        self._snapshot_dirty = False  # Состояние изменено вне потока трекера, нужен новый снимок
+        self.query_server = None  # Локальная HTTP-точка со снимками состояния, включается в настройках
+        self.active_window = None  # Заголовок, полученный на текущем тике
+        self._probe_error = None  # Последняя напечатанная ошибка источника окна
+        self.task_matcher = TaskMatcher(self.tasks)  # Перестраивается только при изменении списка задач
+        self._replaying = False  # Идет восстановление из журнала: без предупреждений и повторной записи
+        self._finished = False  # stop_tracking уже выполнен
+        self.journal = SessionJournal(journal_dir) if journal_dir else None  # None отключает журнал
+        if self.journal:
+            self.recover_session()
+            self.journal.open()
+        self.publish_snapshot()
+
+    def publish_snapshot(self):
+        # Копирование при записи: снимок собирается целиком и подменяет предыдущий одним присваиванием.
+        # Вызывается потоком трекера (или при остановленном потоке), читатели блокировок не берут
+        previous = self.snapshot
+        self._snapshot_dirty = False
+        data_version = self.title_aggregator.version
+        if previous is not None and previous.data_version == data_version:
+            ranking, app_times = previous.ranking, previous.app_times  # Окна не менялись - переиспользуем без копирования
+        else:
+            ranking, app_times = self.report_builder.ranking(), None
+        self.snapshot = TrackerSnapshot.capture(
+            previous.version + 1 if previous else 1,
+            self.clock.time(),
+            self.total_time,
+            self.running,
+            self.paused,
+            ranking,
+            self.tasks,
+            self.task_times,
+            data_version,
+            app_times,
+        )
+        return self.snapshot
+
+    def current_snapshot(self):
+        # Пока поток трекера работает, читаем опубликованный им снимок; без потока состояние
+        # меняется только вызывающим кодом, и снимок можно собрать прямо сейчас
+        return self.snapshot if self.isRunning() else self.publish_snapshot()
+
+    def export_state(self):
+        # Состояние сессии для снимка журнала
+        return {
+            'total_time': self.total_time,
+            'titles': self.title_aggregator.export_state(),
+            'tasks': self.tasks,
+            'task_times': self.task_times,
+            'warning_shown': self.warning_shown,
+            'session_started': self.session_started,
+            'daily_totals': self.daily_totals,
+            'daily_app_times': [[day, app, seconds] for (day, app), seconds in self.daily_app_times.items()],
+            'daily_task_times': [[day, task, seconds] for (day, task), seconds in self.daily_task_times.items()],
+        }
+
+    def recover_session(self):
+        # Восстанавливаем незавершенную (аварийно прерванную) сессию: снимок + хвост журнала
+        state, records = self.journal.recover()
+        if state:
+            self.total_time = state['total_time']
+            self.title_aggregator.restore_state(state['titles'])
+            self.tasks = state['tasks']
+            self.task_times = state['task_times']
+            self.warning_shown = state['warning_shown']
+            self.session_started = state['session_started']
+            self.daily_totals = state['daily_totals']
+            self.daily_app_times = {(day, app): seconds for day, app, seconds in state['daily_app_times']}
+            self.daily_task_times = {(day, task): seconds for day, task, seconds in state['daily_task_times']}
+            self.rebuild_task_matcher()
+        else:
+            # Сбой до первого снимка: сессия началась с первого записанного интервала, а не при перезапуске
+            for record in records:
+                if record[0] == 'interval':
+                    self.session_started = record[2]
+                    break
+
+        self._replaying = True
+        try:
+            for record in records:
+                if record[0] == 'interval':
+                    _, title, start, duration = record
+                    self.apply_interval(title, duration, start)
+                else:
+                    _, name, planned_time = record
+                    self.add_task(name, int(planned_time))
+        finally:
+            self._replaying = False
+
+    def fold_evicted_app(self, app):
+        # Вытесненное из учета приложение переносится в "Прочие приложения" и по дням,
+        # иначе daily_app_times рос бы на каждое новое приложение (окна без разделителя в заголовке)
+        for day in self.daily_totals:
+            seconds = self.daily_app_times.pop((day, app), None)
+            if seconds is not None:
+                key = (day, OTHER_APPS)
+                self.daily_app_times[key] = self.daily_app_times.get(key, 0) + seconds
+
+    @property
+    def app_times(self):
+        # Плоское представление учета: заголовок -> время, включая корзины "прочие"
+        return self.title_aggregator.app_times
+
+    @property
+    def delivery(self):
+        if self._delivery is None:
+            from delivery import ReportDelivery  # requests загружается только к первой отправке отчета
+            self._delivery = ReportDelivery(self.bot_token, self.chat_ids, stats=self.stats)
+        return self._delivery
+
+    @property
+    def sample_interval(self):
+        # Базовый интервал опроса в миллисекундах
+        return int(round(self.scheduler.base_interval * 1000))
+
+    @sample_interval.setter
+    def sample_interval(self, value):
+        self.scheduler.base_interval = value / 1000
+
+    @property
+    def query_port(self):
+        # Порт локальной точки запросов; None - выключена
+        return self.query_server.port if self.query_server else None
+
+    @query_port.setter
+    def query_port(self, port):
+        if self.query_server and self.query_server.port == port:
+            return
+        if self.query_server:
+            self.query_server.close()
+            self.query_server = None
+        if port is not None:
+            from query_server import SnapshotServer  # http.server нужен только при включенной точке
+            try:
+                self.query_server = SnapshotServer(self, port=port)
+            except OSError as e:
+                print(f"Не удалось открыть порт {port} для запросов состояния: {e}")
+
+    def sample_active_window(self):
+        # Единственный опрос ОС за тик; результат разделяют все потребители тика
+        started = self.stats.start()
+        try:
+            self.active_window = self.probe.sample()
+            self._probe_error = None
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}"
+            if message != self._probe_error:  # Одну и ту же ошибку не печатаем на каждом тике
+                print(f"Ошибка при получении активного окна: {e}")
+                self._probe_error = message
+            self.stats.count('probe_failures')
+            self.active_window = None
+        self.stats.stop('probe', started)
+        return self.active_window
 
     def get_active_window(self):
-        active_window = gw.getActiveWindow()
-        return active_window.title if active_window else None
+        return self.active_window  # Заголовок, снятый на текущем тике
 
     def format_time(self, total_seconds):
         hours = int(total_seconds // 3600)
@@ -40,26 +218,53 @@ class TimeTracker(QThread):
         seconds = total_seconds % 60
         return f"{hours} ч. {minutes} мин. {seconds:.0f} сек."
     
-    def check_active_app_for_tasks(self, elapsed_time):
-        active_app = self.get_active_window()
+    def add_task(self, task_name, planned_time):
+        if self.journal and not self._replaying:
+            with self.journal.lock:  # Снимок журнала не должен разойтись с записью о задаче
+                self.journal.append_task(task_name, planned_time)
+                self._add_task(task_name, planned_time)
+        else:
+            self._add_task(task_name, planned_time)
+
+    def _add_task(self, task_name, planned_time):
+        # Новый список вместо изменения старого: поток трекера и снимки не видят его посреди обновления
+        self.tasks = self.tasks + [{'name': task_name, 'planned_time': planned_time}]
+        self.task_times[task_name] = 0  # Сохраняем время начала задачи
+        self.rebuild_task_matcher()
+        self._snapshot_dirty = True
+
+    def rebuild_task_matcher(self):
+        # Новый сопоставитель подменяет старый целиком, поток трекера никогда не видит его недостроенным
+        self.task_matcher = TaskMatcher(self.tasks)
+
+    def check_active_app_for_tasks(self, elapsed_time, active_app=None, day=None):
+        if active_app is None:
+            active_app = self.get_active_window()
         if active_app:
-            for task in self.tasks:
+            # Задачи, хотя бы одно слово из названия которых есть в названии активного приложения
+            for task in self.task_matcher.match(active_app):
                 task_name = task['name']
-                # Проверяем, есть ли хотя бы одно слово из названия задачи в названии активного приложения
-                if any(word in active_app for word in task_name.split()):
-                    if task_name not in self.task_times:
-                        self.task_times[task_name] = 0  # Инициализируем, если еще не было
-                    self.task_times[task_name] += elapsed_time  # Увеличиваем реальное время задачи на прошедшее время
-                    
-                    # Проверяем, достигнуто ли запланированное время
-                    planned_time = task['planned_time']
-                    if self.task_times[task_name] >= planned_time:
-                        self.task_times[task_name] = planned_time  # Ограничиваем время задач до запланированного
+                if task_name not in self.task_times:
+                    self.task_times[task_name] = 0  # Инициализируем, если еще не было
+                previous_time = self.task_times[task_name]
+                self.task_times[task_name] += elapsed_time  # Увеличиваем реальное время задачи на прошедшее время
+
+                # Проверяем, достигнуто ли запланированное время
+                planned_time = task['planned_time']
+                if self.task_times[task_name] >= planned_time:
+                    self.task_times[task_name] = planned_time  # Ограничиваем время задач до запланированного
+                    if not self._replaying:
                         self.show_warning(task_name)  # Вызываем функцию для отображения предупреждения
 
+                if day and self.task_times[task_name] > previous_time:
+                    key = (day, task_name)
+                    self.daily_task_times[key] = self.daily_task_times.get(key, 0) + self.task_times[task_name] - previous_time
+
     def show_warning(self, task_name):
         global warning_shown  # Используем глобальный флаг
         if not warning_shown:  # Проверяем, показано ли уже предупреждение
+            import tkinter as tk  # tkinter нужен только для предупреждения, не загружаем его при запуске
+            from tkinter import messagebox
             # Создаем скрытое основное окно
             root = tk.Tk()
             root.withdraw()  # Скрываем основное окно
@@ -69,79 +274,188 @@ class TimeTracker(QThread):
     
     def run(self):
         self.running = True
-        start_time = time.time()
+        self._wake.clear()
+        self.scheduler.reset()
+        start_time = self.clock.monotonic()  # Монотонные часы не зависят от перевода системного времени
+        wall_offset = self.clock.time() - start_time  # Для перевода моментов монотонных часов в unix-время журнала
+        last_app = None
+        interval = 0  # Первый замер делаем сразу
+        last_emit = None
 
         while self.running:
-            if not self.paused:  # Проверяем, не приостановлен ли отсчет
-                current_time = time.time()
-                elapsed_time = current_time - start_time
-                self.total_time += elapsed_time
-
-                self.check_active_app_for_tasks(elapsed_time)  # Передаем прошедшее время
-
-                active_app = self.get_active_window()
-                if active_app and active_app not in self.app_times:
-                    self.app_times[active_app] = 0
-                if active_app:
-                    self.app_times[active_app] += elapsed_time
-
-                formatted_time = self.format_time(self.total_time)
-                self.update_time.emit(formatted_time)
-
-                start_time = current_time
-            else:
-                time.sleep(1)  # Если приостановлено, просто ждем
-                
+            if self.paused:  # Проверяем, не приостановлен ли отсчет
+                if self._snapshot_dirty or not self.snapshot.paused:
+                    self.publish_snapshot()
+                self.clock.wait(self._wake, 1)  # Если приостановлено, просто ждем
+                self._wake.clear()
+                start_time = self.clock.monotonic()  # Время паузы не засчитываем
+                interval = 0  # После возобновления первый замер сразу, без накопленного замедления
+                continue
+
+            self.clock.wait(self._wake, interval)  # Ждем следующего тика; пауза и остановка прерывают ожидание
+            self._wake.clear()
+
+            current_time = self.clock.monotonic()
+            if self.paused:
+                current_time = min(current_time, self.pause_start_time)  # Досчитываем время до начала паузы
+            elapsed_time = current_time - start_time
+            stats = self.stats
+            tick_started = stats.start()
+            stats.count('ticks')
+
+            active_app = self.sample_active_window()
+            interval_start = wall_offset + start_time
+            self.apply_interval(active_app, elapsed_time, interval_start)
+            if self.journal:
+                started = stats.start()
+                self.journal.append_interval(active_app, interval_start, elapsed_time)
+                self.journal.maybe_flush(self.export_state)
+                stats.stop('journal', started)
+            for listener in self.interval_listeners:
+                listener(active_app, interval_start, elapsed_time)
+
+            # В интерфейс уходит только числовой снимок и не чаще display_rate; форматирует его GUI
+            if self.paused or last_emit is None or current_time - last_emit >= 1 / self.display_rate:
+                started = stats.start()
+                self.update_time.emit(self.total_time, current_time, not self.paused)
+                stats.stop('signal_emit', started)
+                stats.count('signals_emitted')
+                last_emit = current_time
+                self.publish_snapshot()  # Снимок для отчетов и запросов - с той же частотой, что и интерфейс
+            stats.stop('tick', tick_started)
+
+            start_time = current_time
+            interval = self.scheduler.next_interval(active_app != last_app)
+            last_app = active_app
+
+        self.running = False
+        self.publish_snapshot()
+        self.update_time.emit(self.total_time, self.clock.monotonic(), False)
+        if self.journal:
+            self.journal.flush(fsync=True)
+
+    def apply_interval(self, active_app, elapsed_time, start=None):
+        # Учет одного интервала фокуса; используется и на живом тике, и при воспроизведении журнала.
+        # start - unix-время начала интервала, по нему время разносится по дням для истории
+        day = date.fromtimestamp(self.clock.time() if start is None else start).isoformat()
+        self.total_time += elapsed_time
+        self.daily_totals[day] = self.daily_totals.get(day, 0) + elapsed_time
+        started = self.stats.start()
+        self.check_active_app_for_tasks(elapsed_time, active_app, day)  # Передаем прошедшее время
+        self.stats.stop('task_matching', started)
+
+        if active_app:
+            started = self.stats.start()
+            app = self.title_aggregator.add(active_app, elapsed_time)
+            key = (day, app)
+            self.daily_app_times[key] = self.daily_app_times.get(key, 0) + elapsed_time
+            self.stats.stop('aggregation', started)
+
     def pause_tracking(self):
         if not self.paused:  # Проверяем, не приостановлен ли отсчет
             self.paused = True
-            self.pause_start_time = time.time()  # Запоминаем время начала паузы
+            self.pause_start_time = self.clock.monotonic()  # Запоминаем время начала паузы
+            self._wake.set()
 
     def resume_tracking(self):
         if self.paused:  # Проверяем, действительно ли отсчет приостановлен
-            self.elapsed_during_pause += time.time() - self.pause_start_time  # Вычисляем время, проведенное в паузе
-            self.elapsed_during_pause_temp = self.elapsed_during_pause
-            self.total_time -= self.elapsed_during_pause
-            self.elapsed_during_pause = 0            
+            # Время паузы не попадает в общее время: после возобновления отсчет идет с текущего момента
+            self.elapsed_during_pause_temp = self.clock.monotonic() - self.pause_start_time
             self.triggerd_count = 1
+            self.scheduler.reset()
             self.paused = False
+            self._wake.set()
 
-    def stop_tracking(self):
+    def request_stop(self):
+        # Просит поток трекера завершиться; сам не ждет. Безопасно вызывать из обработчика сигнала
         self.running = False
-        self.send_final_report()
-        self.tasks.clear()  # Очистка задач при завершении отсчета
-
-    def save_report(self):
-        desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-        report_file = os.path.join(desktop_path, "time_tracker_report.txt")
-
-        with open(report_file, 'w', encoding='utf-8') as file:
-            file.write(f"Общее время: {self.format_time(self.total_time)}.\n")
-            file.write("Хронометраж по приложениям:\n")
-            sorted_apps = sorted(self.app_times.items(), key=lambda x: x[1], reverse=True)
-            for app, time_spent in sorted_apps:
-                file.write(f"- {app}: {self.format_time(time_spent)}.\n")
-
-            file.write("\nЗадачи на сессию:\n")
-            for task in self.tasks:
-                planned_time = task['planned_time']
-                real_time = self.task_times.get(task['name'], 0)
-                if real_time >= planned_time:
-                    file.write(f"- {task['name']}: Задача выполнена\n")
-                else:
-                    file.write(f"- {task['name']}: {self.format_time(planned_time)} // {self.format_time(real_time)}\n")
-
-        return report_file
-
-
+        self._wake.set()
 
-
-    def create_chart(self):
-        apps = list(self.app_times.keys())
-        times = [self.app_times[app] for app in apps]
+    def stop_tracking(self):
+        if self._finished:
+            return  # Сессия уже завершена: повторная остановка не должна записать ее в историю еще раз
+        self._finished = True
+        self.request_stop()
+        self.wait()  # Поток просыпается сразу и успевает учесть последний интервал
+        self.publish_snapshot()  # Поток трекера остановлен - финальный снимок можно собрать здесь
+        self.send_final_report()
+        self.record_history()
+        self.delivery.close()  # Финальный отчет будет доставлен в фоне, окно не ждет сети
+        if self.journal:
+            self.journal.close()  # Сессия завершена штатно - журнал уходит в архив
+        self.query_port = None
+        self.tasks = []  # Очистка задач при завершении отсчета; финальный отчет строится по снимку
+        self.rebuild_task_matcher()
+
+    def record_history(self):
+        # Завершенная сессия и ее вклад в дневные/недельные сводки записываются одной транзакцией
+        if self.history and self.total_time:
+            try:
+                self.history.record_session(self.session_started, self.clock.time(), self.total_time,
+                                            self.daily_totals, self.daily_app_times, self.daily_task_times,
+                                            self.tasks)
+            except Exception as e:
+                print(f"Ошибка при сохранении истории сессии: {e}")
+
+    def require_history(self):
+        if self.history is None:
+            raise ValueError("История сессий отключена.")
+        return self.history
+
+    def save_report(self, path=None, start=None, end=None, snapshot=None):
+        # Возвращает текст отчета; в файл он записывается, только если передан path.
+        # start/end (дни включительно) - отчет по истории сессий за период вместо текущей сессии.
+        # Текущая сессия берется из снимка состояния (по умолчанию - текущего)
+        started = self.stats.start()
+        if start or end:
+            history = self.require_history()
+            report = self.report_builder.build_period(start, end, history.total_time(start, end),
+                                                      history.app_times(start, end), history.task_times(start, end))
+        else:
+            snapshot = snapshot or self.current_snapshot()
+            report = self.report_builder.build(snapshot.total_time, snapshot.tasks, snapshot.task_times, snapshot.ranking)
+        self.stats.stop('report_build', started)
+
+        if path:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(report)
+        return report
+
+    def create_chart(self, path=None, start=None, end=None, snapshot=None):
+        # Диаграмма строится через объектный API Agg (без глобального состояния pyplot),
+        # поэтому ее можно строить вне GUI-потока. PNG возвращается байтами; path - необязательная запись в файл.
+        # start/end (дни включительно) - диаграмма по истории сессий за период.
+        # Если учтенного времени по приложениям еще нет, диаграмму не строим и возвращаем None
+        if start or end:
+            history = self.require_history()
+            app_times, total_time = history.app_times(start, end), history.total_time(start, end)
+            key = ('history', str(start), str(end), tuple(app_times.items()), self.threshold_percentage, self.elements_threshold)
+        else:
+            snapshot = snapshot or self.current_snapshot()
+            app_times, total_time = snapshot.app_times, snapshot.total_time
+            key = (snapshot.data_version, snapshot.total_time, self.threshold_percentage, self.elements_threshold)
+        if not any(time > 0 for time in app_times.values()):
+            return None  # Пустую круговую диаграмму matplotlib не строит
+        cached_key, png = self._chart_cache
+        if cached_key != key:
+            started = self.stats.start()
+            png = self._render_chart(app_times, total_time)
+            self.stats.stop('chart_render', started)
+            self._chart_cache = (key, png)  # Пока данные не изменились, диаграмма не перестраивается
+        else:
+            self.stats.count('chart_cache_hits')
+
+        if path:
+            with open(path, 'wb') as file:
+                file.write(png)
+        return png
+
+    def _render_chart(self, app_times, total_time):
+        apps = list(app_times.keys())
+        times = [app_times[app] for app in apps]
 
         if len(apps) > self.elements_threshold:
-            threshold = self.total_time * (self.threshold_percentage / 100)
+            threshold = total_time * (self.threshold_percentage / 100)
             other_time = sum(time for time in times if time < threshold)
             filtered_apps = [app for app, time in zip(apps, times) if time >= threshold]
             filtered_times = [time for time in times if time >= threshold]
@@ -153,64 +467,61 @@ class TimeTracker(QThread):
             apps = filtered_apps
             times = filtered_times
 
-        plt.figure(figsize=(8, 8))
-        plt.pie(times, labels=apps, autopct='%1.1f%%', startangle=140, colors=plt.cm.Paired.colors)
-        plt.title('Время, проведенное в приложениях')
-        plt.axis('equal')
-
-        chart_file = os.path.join(os.path.expanduser("~"), "Desktop", "time_tracker_chart.png")
-        plt.savefig(chart_file)
-        plt.close()
-        return chart_file
-
-        #plt.figure(figsize=(8, 8))
-        #plt.pie(times, labels=apps, autopct='%1.1f%%', startangle=140, colors=plt.cm.Paired.colors)
-        #plt.title('Время, проведенное в приложениях')
-        #plt.axis('equal')
-
-        #chart_file = os.path.join(os.path.expanduser("~"), "Desktop", "time_tracker_chart.png")
-        #plt.savefig(chart_file)
-        #plt.close()
-        #return chart_file
+        # matplotlib загружается при первом построении диаграммы (или заранее, фоновым прогревом)
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib import cm
+
+        figure = Figure(figsize=(8, 8))
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        axes.pie(times, labels=apps, autopct='%1.1f%%', startangle=140, colors=cm.Paired.colors)
+        axes.set_title('Время, проведенное в приложениях')
+        axes.axis('equal')
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format='png')
+        return buffer.getvalue()
+
+    def render_report(self, snapshot=None):
+        # Формирует отчет один раз для всех получателей; выполняется в потоке доставки.
+        # Текст, диаграмма и сообщение строятся по одному снимку и не расходятся между собой
+        snapshot = snapshot or self.current_snapshot()
+        documents = [("time_tracker_report.txt", self.save_report(snapshot=snapshot).encode('utf-8'))]
+        png = self.create_chart(snapshot=snapshot)  # Отчет и диаграмма уходят из памяти, без диска
+        if png is not None:
+            documents.append(("time_tracker_chart.png", png))  # До первого замера отчет уходит без диаграммы
+        from delivery import Report
+        return Report(f"Общее время: {self.format_time(snapshot.total_time)}.", documents)
+
+    @staticmethod
+    def warm_up():
+        # Загружает тяжелые модули отчетов заранее, чтобы первый отчет не ждал импорта.
+        # Вызывается в фоновом потоке после отрисовки окна
+        import matplotlib.figure
+        import matplotlib.backends.backend_agg
+        import delivery
+        try:
+            import pygetwindow
+        except Exception:
+            pass  # На неподдерживаемых системах источник окна сообщит об ошибке сам
 
     def send_final_report(self):
-        report_file = self.save_report()
-        chart_file = self.create_chart()  # Создание диаграммы для финального отчета
-        self.send_telegram_message(self.format_time(self.total_time), report_file, chart_file)
+        snapshot = self.snapshot  # Задачи очищаются сразу после остановки, отчет строится по последнему снимку
+        self.delivery.submit(lambda: self.render_report(snapshot))
 
-    def send_periodic_report(self):
-        report_file = self.save_report()
-        chart_file = self.create_chart()  # Создание диаграммы для автоотчетов
-        self.send_telegram_message(self.format_time(self.total_time), report_file, chart_file)
-
-    def send_telegram_message(self, formatted_time, report_file, chart_file):
-        message = f"Общее время: {formatted_time}."
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        payload = {
-            'chat_id': self.chat_id,
-            'text': message
-        }
+    def wait_for_delivery(self, timeout=None):
+        # Дожидается отправки уже поставленных отчетов не дольше timeout; недоставленное отменяется
+        if self._delivery is not None:
+            self._delivery.close(wait=True, timeout=timeout)
 
-        try:
-            response = requests.post(url, data=payload)
-            if response.status_code == 200:
-                print("Сообщение отправлено в Telegram.")
-
-            with open(report_file, 'rb') as file:
-                files = {'document': file}
-                url = f"https://api.telegram.org/bot{self.bot_token}/sendDocument"
-                response = requests.post(url, data={'chat_id': self.chat_id}, files=files)
-
-            with open(chart_file, 'rb') as file:
-                files = {'document': file}
-                url = f"https://api.telegram.org/bot{self.bot_token}/sendDocument"
-                response = requests.post(url, data={'chat_id': self.chat_id}, files=files)
+    def send_periodic_report(self):
+        self.delivery.submit(self.render_report, coalesce=True)  # Устаревший автоотчет заменяется новым
 
-        except Exception as e:
-            print(f"Ошибка при отправке сообщения в Telegram: {e}")
-            
     def show_warning(self, task_name):
         if not self.warning_shown:  # Используем атрибут класса
+            import tkinter as tk  # tkinter нужен только для предупреждения, не загружаем его при запуске
+            from tkinter import messagebox
             # Создаем скрытое основное окно
             root = tk.Tk()
             root.withdraw()  # Скрываем основное окно
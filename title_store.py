@@ -0,0 +1,189 @@
+import re
+from array import array
+
+OTHER_APPS = "Прочие приложения"  # Ключ для времени приложений, вытесненных из учета
+OTHER_TITLES = "прочие окна"  # Суффикс ключа для вытесненных окон приложения
+
+# Разделители, которыми браузеры и редакторы отделяют документ/вкладку от названия приложения
+APP_SEPARATOR = re.compile(r"\s+[-–—|]\s+")
+
+
+def app_name(title):
+    # "Документ - Приложение" -> "Приложение"; заголовок без разделителя считается названием приложения
+    parts = APP_SEPARATOR.split(title)
+    return parts[-1].strip() or title
+
+
+class TitleStore:
+    # Интернированные заголовки: каждому заголовку - числовой id, время хранится в массивах по id.
+    # Освобожденные id используются повторно, поэтому память ограничена числом отслеживаемых заголовков
+    __slots__ = ('_ids', '_titles', '_free', 'counts', 'errors')
+
+    def __init__(self):
+        self._ids = {}
+        self._titles = []
+        self._free = []
+        self.counts = array('d')  # Время заголовка вместе с унаследованной при вытеснении погрешностью
+        self.errors = array('d')  # Унаследованная погрешность (Space-Saving)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def lookup(self, title):
+        return self._ids.get(title)
+
+    def intern(self, title, count=0.0, error=0.0):
+        title_id = self._ids.get(title)
+        if title_id is not None:
+            return title_id
+        if self._free:
+            title_id = self._free.pop()
+            self._titles[title_id] = title
+            self.counts[title_id] = count
+            self.errors[title_id] = error
+        else:
+            title_id = len(self._titles)
+            self._titles.append(title)
+            self.counts.append(count)
+            self.errors.append(error)
+        self._ids[title] = title_id
+        return title_id
+
+    def title(self, title_id):
+        return self._titles[title_id]
+
+    def time(self, title_id):
+        # Гарантированное время заголовка (без унаследованной погрешности)
+        return self.counts[title_id] - self.errors[title_id]
+
+    def release(self, title_id):
+        del self._ids[self._titles[title_id]]
+        self._titles[title_id] = None
+        self._free.append(title_id)
+
+
+class AppBucket:
+    __slots__ = ('name', 'total', 'error', 'other', 'title_ids')
+
+    def __init__(self, name, error=0.0):
+        self.name = name
+        self.total = 0.0  # Время приложения с момента появления в учете
+        self.error = error  # Унаследованная при вытеснении погрешность (для ранжирования приложений)
+        self.other = 0.0  # Время вытесненных окон приложения
+        self.title_ids = set()
+
+    @property
+    def other_key(self):
+        return f"{self.name}: {OTHER_TITLES}"
+
+
+class TitleAggregator:
+    # Учет времени по иерархии приложение -> заголовок с ограниченной памятью.
+    # И приложения, и заголовки внутри приложения отбираются по схеме Space-Saving:
+    # часто встречающиеся сохраняются точно, редкие сворачиваются в корзины "прочие".
+    # Сумма всех корзин всегда равна полному учтенному времени.
+    # app_times - плоское представление (заголовок -> время) для отчетов и диаграмм
+    def __init__(self, titles_per_app=10, max_apps=50):
+        self.titles_per_app = titles_per_app
+        self.max_apps = max_apps
+        self.store = TitleStore()
+        self.apps = {}
+        self.other = 0.0  # Время вытесненных приложений
+        self.app_times = {}
+        self.listeners = []  # Вызываются как listener(key, time); time=None - ключ удален
+        self.eviction_listeners = []  # Вызываются как listener(приложение), когда оно уходит в OTHER_APPS
+        self.version = 0  # Растет при каждом изменении app_times
+
+    def _set(self, key, value):
+        self.app_times[key] = value
+        self.version += 1
+        for listener in self.listeners:
+            listener(key, value)
+
+    def _remove(self, key):
+        if self.app_times.pop(key, None) is not None:
+            self.version += 1
+            for listener in self.listeners:
+                listener(key, None)
+
+    def add(self, title, seconds):
+        name = app_name(title)
+        bucket = self.apps.get(name)
+        if bucket is None:
+            bucket = self._new_app(name)
+        bucket.total += seconds
+
+        store = self.store
+        title_id = store.lookup(title)
+        if title_id is None:
+            title_id = self._new_title(bucket, title)
+        store.counts[title_id] += seconds
+        self._set(title, store.time(title_id))
+        return name
+
+    def _new_app(self, name):
+        error = 0.0
+        while len(self.apps) >= self.max_apps:
+            # Вытесняем приложение с наименьшим временем; новое наследует его ранг как погрешность
+            victim = min(self.apps.values(), key=lambda bucket: bucket.total + bucket.error)
+            error = victim.total + victim.error
+            self._evict_app(victim)
+        bucket = self.apps[name] = AppBucket(name, error)
+        return bucket
+
+    def _evict_app(self, bucket):
+        del self.apps[bucket.name]
+        for title_id in bucket.title_ids:
+            self._remove(self.store.title(title_id))
+            self.store.release(title_id)
+        self._remove(bucket.other_key)
+        self.other += bucket.total
+        self._set(OTHER_APPS, self.other)
+        for listener in self.eviction_listeners:
+            listener(bucket.name)
+
+    def _new_title(self, bucket, title):
+        store = self.store
+        count = 0.0
+        while len(bucket.title_ids) >= self.titles_per_app:
+            victim = min(bucket.title_ids, key=store.counts.__getitem__)
+            count = store.counts[victim]
+            bucket.other += store.time(victim)
+            self._remove(store.title(victim))
+            bucket.title_ids.discard(victim)
+            store.release(victim)
+            self._set(bucket.other_key, bucket.other)
+        title_id = store.intern(title, count, count)  # Новый заголовок начинает с ранга вытесненного
+        bucket.title_ids.add(title_id)
+        return title_id
+
+    def export_state(self):
+        store = self.store
+        return {
+            'other': self.other,
+            'apps': [
+                {
+                    'name': bucket.name,
+                    'total': bucket.total,
+                    'error': bucket.error,
+                    'other': bucket.other,
+                    'titles': [[store.title(i), store.counts[i], store.errors[i]] for i in bucket.title_ids],
+                }
+                for bucket in self.apps.values()
+            ],
+        }
+
+    def restore_state(self, state):
+        self.other = state['other']
+        if self.other:
+            self._set(OTHER_APPS, self.other)
+        for app in state['apps']:
+            bucket = self.apps[app['name']] = AppBucket(app['name'], app['error'])
+            bucket.total = app['total']
+            bucket.other = app['other']
+            if bucket.other:
+                self._set(bucket.other_key, bucket.other)
+            for title, count, error in app['titles']:
+                title_id = self.store.intern(title, count, error)
+                bucket.title_ids.add(title_id)
+                self._set(title, self.store.time(title_id))